@@ -0,0 +1,404 @@
+"""
+Benchmarks del motor de calendario y de los exportadores.
+
+Mide compute_weeks(), get_colombia_holidays(), build_excel() (en memoria, streaming y XlsxWriter),
+build_pdf(), build_workbook() (todos los cursos en un libro), la planificación de muchos cursos
+(plan_sessions() frente al modelo por curso), la memoria por curso cargado (EntryTable/WeekTable
+frente a diccionarios y listas) y el modo por lotes (también con la caché de exportaciones llena)
+con entradas sintéticas que escalan en varios ejes:
+
+- semanas (18 → 5.000)
+- cursos por lote (1 → 1.000)
+- largo del texto de cada sesión
+- densidad de festivos y exámenes
+
+Cada caso varía un solo eje respecto a una base fija (18 semanas, 40 caracteres, 10 % de
+festivos/exámenes) y se ejecuta en un proceso nuevo, para que el pico de memoria de un caso no
+contamine al siguiente. Por caso se informa el tiempo de pared (mejor de N repeticiones), el
+pico de memoria (RSS, sólo Linux/macOS) y el tamaño del archivo generado.
+
+Uso
+    python benchmark_calendario.py                      # suite rápida -> benchmark_resultados.json
+    python benchmark_calendario.py --suite full --out despues.json
+    python benchmark_calendario.py --compare antes.json despues.json
+"""
+
+import sys
+import importlib.util
+import os
+import json
+import platform
+import random
+import shutil
+import tempfile
+import time
+from contextlib import redirect_stdout
+from datetime import date, datetime, timedelta
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+import generar_calendario_gui as cal
+
+START = date(2025, 8, 18)
+SEED = 1234
+BASE = {"weeks": 18, "courses": 1, "text_len": 40, "holiday_density": 0.1, "exam_density": 0.1}
+
+SUITES: Dict[str, Dict[str, List[Any]]] = {
+    "quick": {
+        "weeks": [18, 100, 500],
+        "courses": [1, 10],
+        "text_len": [0, 40, 400],
+        "density": [0.0, 0.1, 0.5],
+    },
+    "full": {
+        "weeks": [18, 100, 500, 1000, 5000],
+        "courses": [1, 10, 100, 1000],
+        "text_len": [0, 40, 400, 2000],
+        "density": [0.0, 0.1, 0.3, 0.5],
+    },
+}
+
+# Temas típicos de un curso: se repiten entre semanas y entre cursos
+TOPICS = ["Sesión por confirmar", "Repaso", "Laboratorio", "Taller práctico", "Examen parcial"] + [
+    f"Unidad {u}: tema {t}" for u in range(1, 8) for t in range(1, 6)
+]
+
+# Exportadores medidos en los ejes de semanas/texto/densidad
+EXPORTERS = ["compute_weeks", "holidays_cold", "holidays_warm", "excel", "excel_streaming", "excel_xlsxwriter", "pdf",
+             "pdf_fast", "pdf_canvas", "ics"]
+
+
+def synthetic_inputs(weeks: int, text_len: int, holiday_density: float, exam_density: float) -> Tuple[
+    List[cal.WeekDates], Dict[int, Tuple[str, str, str, str]], Dict[date, str], Set[date]
+]:
+    """Genera semanas, textos, festivos y exámenes reproducibles (semilla fija)."""
+    rng = random.Random(SEED)
+    week_dates = cal.compute_weeks(START, weeks)
+    words = ["Biomoléculas", "Laboratorio", "Taller", "Célula", "Enzimas", "Repaso", "Sesión", "práctica"]
+
+    def text() -> str:
+        out = ""
+        while len(out) < text_len:
+            out += rng.choice(words) + " "
+        return out[:text_len].strip()
+
+    entries = {wd.semana: (text(), text(), text(), text()) for wd in week_dates}
+    holidays_map: Dict[date, str] = {}
+    exam_dates: Set[date] = set()
+    for wd in week_dates:
+        for d in (wd.lunes, wd.martes, wd.miercoles):
+            if rng.random() < holiday_density:
+                holidays_map[d] = "Festivo sintético"
+        if rng.random() < exam_density:
+            exam_dates.add(wd.miercoles)
+    return week_dates, entries, holidays_map, exam_dates
+
+
+def _peak_rss_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    # Linux informa kB; macOS, bytes
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return round(max(peak, peak_children) / scale, 1)
+
+
+_RSS_BEFORE: Optional[float] = None
+
+
+def _best_of(fn: Any, repeat: int) -> float:
+    global _RSS_BEFORE
+    _RSS_BEFORE = _peak_rss_mb()
+    best = float("inf")
+    for _ in range(repeat):
+        t = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t)
+    return best
+
+
+def run_case(case: Dict[str, Any]) -> Dict[str, Any]:
+    """Ejecuta un caso (se llama dentro de un proceso nuevo) y retorna sus métricas."""
+    exporter = case["exporter"]
+    repeat = case["repeat"]
+    tmp = tempfile.mkdtemp(prefix="calbench_")
+    size: Optional[int] = None
+    per_course: Optional[float] = None
+    try:
+        week_dates, entries, holidays_map, exam_dates = synthetic_inputs(
+            case["weeks"], case["text_len"], case["holiday_density"], case["exam_density"])
+        if exporter == "compute_weeks":
+            wall = _best_of(lambda: cal.compute_weeks(START, case["weeks"]), repeat)
+        elif exporter in ("holidays_cold", "holidays_warm"):
+            end = week_dates[-1].miercoles
+
+            def lookup() -> None:
+                if exporter == "holidays_cold":
+                    cal.HOLIDAY_INDEX.clear()
+                cal.get_colombia_holidays(START, end)
+
+            cal.get_colombia_holidays(START, end)  # importaciones/caché de disco fuera de la medición
+            wall = _best_of(lookup, repeat)
+        elif exporter in ("excel", "excel_streaming", "excel_xlsxwriter", "pdf", "pdf_fast", "pdf_canvas"):
+            is_pdf = exporter.startswith("pdf")
+            mode = {"pdf_fast": "fast", "pdf_canvas": "canvas"}.get(exporter, "platypus")
+            engine = "xlsxwriter" if exporter == "excel_xlsxwriter" else "openpyxl"
+            path = os.path.join(tmp, "out.pdf" if is_pdf else "out.xlsx")
+            # Calentamiento con una semana: la importación diferida de openpyxl/reportlab
+            # no debe contarse como tiempo del exportador
+            if is_pdf:
+                cal.build_pdf(path, "", "", week_dates[:1], {}, {}, set(), mode=mode)
+            else:
+                cal.build_excel(path, "", "", week_dates[:1], {}, {}, set(), engine=engine)
+            if is_pdf:
+                def export() -> None:
+                    cal.build_pdf(path, "Benchmark", "Sintético", week_dates, entries, holidays_map, exam_dates, mode=mode)
+            else:
+                def export() -> None:
+                    cal.build_excel(path, "Benchmark", "Sintético", week_dates, entries, holidays_map, exam_dates,
+                                    streaming=exporter == "excel_streaming", engine=engine)
+            wall = _best_of(export, repeat)
+            size = os.path.getsize(path)
+        elif exporter in ("plan_numpy", "plan_python"):
+            # Cursos con inicios escalonados a lo largo de varios años
+            starts = [START + timedelta(weeks=i % 156) for i in range(case["courses"])]
+            counts = [case["weeks"]] * case["courses"]
+            shift = [timedelta(weeks=i % 156) for i in range(case["courses"])]
+            exams = [{d + s for d in exam_dates} for s in shift]
+            if exporter == "plan_numpy":
+                cal.plan_sessions(starts[:1], counts[:1], exams[:1])  # importa numpy fuera de la medición
+                wall = _best_of(lambda: cal.plan_sessions(starts, counts, exams), repeat)
+            else:
+                def plan() -> None:
+                    cal._MODEL_CACHE.clear()
+                    for s, n, ex in zip(starts, counts, exams):
+                        wd = cal.compute_weeks(s, n)
+                        cal.build_calendar_model(wd, cal.get_colombia_holidays(s, wd[-1].miercoles), ex)
+
+                wall = _best_of(plan, repeat)
+        elif exporter in ("courses_compact", "courses_plain"):
+            import tracemalloc
+
+            rng = random.Random(SEED)
+            # Cada curso llega como texto JSON (igual que al leer respaldos del disco)
+            sources = [json.dumps({
+                "title": f"Curso {i}", "start_date": START.isoformat(), "weeks": case["weeks"],
+                "entries": {str(w): [rng.choice(TOPICS) for _ in range(4)] for w in range(1, case["weeks"] + 1)},
+            }) for i in range(case["courses"])]
+
+            def load() -> List[Any]:
+                if exporter == "courses_compact":
+                    return [cal._parse_course(json.loads(src)) for src in sources]
+                out = []
+                for src in sources:
+                    rec = json.loads(src)
+                    start = date.fromisoformat(rec["start_date"])
+                    out.append((rec["title"], start, list(cal.compute_weeks(start, rec["weeks"])),
+                                {int(k): tuple(v) for k, v in rec["entries"].items()}))
+                return out
+
+            tracemalloc.start()
+            before = tracemalloc.get_traced_memory()[0]
+            kept = load()
+            per_course = (tracemalloc.get_traced_memory()[0] - before) / max(1, len(kept))
+            tracemalloc.stop()
+            del kept
+            wall = _best_of(load, repeat)
+        elif exporter in ("batch", "batch_cached"):
+            manifest = os.path.join(tmp, "manifest.json")
+            record = {
+                "title": "Benchmark", "subtitle": "Sintético", "start_date": START.isoformat(),
+                "weeks": case["weeks"], "exam_dates": [d.isoformat() for d in sorted(exam_dates)],
+                "entries": {str(k): list(v) for k, v in entries.items()},
+            }
+            with open(manifest, "w", encoding="utf-8") as f:
+                json.dump([dict(record, name=f"curso_{i}") for i in range(case["courses"])], f)
+            out_dir = os.path.join(tmp, "salida")
+
+            def batch() -> None:
+                shutil.rmtree(out_dir, ignore_errors=True)
+                with redirect_stdout(open(os.devnull, "w")):
+                    cal.run_batch(manifest, out_dir, case.get("workers"), ("xlsx", "pdf"))
+
+            if exporter == "batch_cached":
+                # Regeneración sin cambios: una pasada llena la caché y se mide la siguiente
+                cache_dir = os.path.join(tmp, "cache")
+                cal.EXPORT_CACHE.root = cache_dir
+                os.environ["CALENDARIO_EXPORT_CACHE"] = cache_dir
+                batch()
+            wall = _best_of(batch, repeat)
+            size = sum(os.path.getsize(os.path.join(out_dir, n)) for n in os.listdir(out_dir))
+        elif exporter == "workbook":
+            # Todos los cursos en un solo libro (una hoja por curso + índice)
+            record = {
+                "title": "Benchmark", "subtitle": "Sintético", "start_date": START.isoformat(),
+                "weeks": case["weeks"], "exam_dates": [d.isoformat() for d in sorted(exam_dates)],
+                "entries": {str(k): list(v) for k, v in entries.items()},
+            }
+            courses = [cal._parse_course(dict(record, name=f"curso_{i}")) for i in range(case["courses"])]
+            path = os.path.join(tmp, "libro.xlsx")
+            wall = _best_of(lambda: cal.build_workbook(path, courses), repeat)
+            size = os.path.getsize(path)
+        elif exporter in ("sessions_csv", "sessions_parquet"):
+            # Tabla plana de sesiones (una fila por sesión) para todos los cursos
+            record = {
+                "title": "Benchmark", "subtitle": "Sintético", "start_date": START.isoformat(),
+                "weeks": case["weeks"], "exam_dates": [d.isoformat() for d in sorted(exam_dates)],
+                "entries": {str(k): list(v) for k, v in entries.items()},
+            }
+            courses = [cal._parse_course(dict(record, name=f"curso_{i}")) for i in range(case["courses"])]
+            path = os.path.join(tmp, "sesiones." + exporter.split("_")[1])
+            wall = _best_of(lambda: cal.write_sessions(path, courses), repeat)
+            size = os.path.getsize(path)
+        elif exporter == "import_excel":
+            # Excel devueltos por los docentes: un archivo por curso, leídos al almacén
+            paths = [os.path.join(tmp, f"curso_{i}.xlsx") for i in range(case["courses"])]
+            for p in paths:
+                cal.build_excel(p, "Benchmark", "Sintético 2025", week_dates, entries, holidays_map, exam_dates,
+                                streaming=True)
+            store = cal.CalendarStore(os.path.join(tmp, "cursos.db"))
+            try:
+                wall = _best_of(lambda: store.import_excel(paths), repeat)
+            finally:
+                store.close()
+            size = sum(os.path.getsize(p) for p in paths)
+        elif exporter == "ics":
+            path = os.path.join(tmp, "out.ics")
+            wall = _best_of(lambda: cal.build_ics(path, "Benchmark", "Sintético", week_dates, entries, holidays_map,
+                                                  exam_dates), repeat)
+            size = os.path.getsize(path)
+        else:
+            raise ValueError(f"exportador desconocido: {exporter}")
+        rss_after = _peak_rss_mb()
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    out = dict(case)
+    out.update({
+        "wall_s": round(wall, 6),
+        "peak_rss_mb": rss_after,
+        "peak_rss_delta_mb": None if rss_after is None or _RSS_BEFORE is None else round(rss_after - _RSS_BEFORE, 1),
+        "output_bytes": size,
+        "bytes_per_course": None if per_course is None else round(per_course),
+    })
+    return out
+
+
+def build_cases(suite: str, repeat: int, workers: Optional[int]) -> List[Dict[str, Any]]:
+    """Casos de la suite: un eje a la vez alrededor de BASE."""
+    axes = SUITES[suite]
+    cases: List[Dict[str, Any]] = []
+
+    def add(exporter: str, axis: str, **overrides: Any) -> None:
+        case = dict(BASE, exporter=exporter, axis=axis, repeat=repeat)
+        case.update(overrides)
+        if case not in cases:
+            cases.append(case)
+
+    for exporter in EXPORTERS:
+        if exporter == "excel_xlsxwriter" and importlib.util.find_spec("xlsxwriter") is None:
+            continue  # motor opcional
+        for w in axes["weeks"]:
+            # El PDF crece mucho más lento que el resto: una sola repetición para tamaños grandes
+            add(exporter, "weeks", weeks=w, **({"repeat": 1} if w > 500 else {}))
+        if exporter.startswith(("excel", "pdf", "ics")):
+            for n in axes["text_len"]:
+                add(exporter, "text_len", text_len=n)
+            for dens in axes["density"]:
+                add(exporter, "density", holiday_density=dens, exam_density=dens)
+    for n in axes["courses"]:
+        add("batch", "courses", courses=n, workers=workers, repeat=1)
+        add("batch_cached", "courses", courses=n, workers=workers, repeat=1)
+        add("workbook", "courses", courses=n, repeat=1)
+        add("import_excel", "courses", courses=n, repeat=1)
+        add("sessions_csv", "courses", courses=n)
+        if importlib.util.find_spec("pyarrow") is not None:
+            add("sessions_parquet", "courses", courses=n)  # pyarrow es opcional
+        if cal.numpy_available():
+            add("plan_numpy", "courses", courses=n)
+        add("plan_python", "courses", courses=n)
+        add("courses_compact", "courses", courses=n)
+        add("courses_plain", "courses", courses=n)
+    return cases
+
+
+def run_suite(suite: str, repeat: int, workers: Optional[int]) -> Dict[str, Any]:
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    ctx = multiprocessing.get_context("spawn")
+    results = []
+    cases = build_cases(suite, repeat, workers)
+    for i, case in enumerate(cases, start=1):
+        # Proceso nuevo por caso: el pico de RSS corresponde sólo a ese caso. Los procesos de
+        # ProcessPoolExecutor no son daemon, así que el caso "batch" puede abrir su propio pool
+        with ProcessPoolExecutor(max_workers=1, mp_context=ctx) as pool:
+            res = pool.submit(run_case, case).result()
+        results.append(res)
+        extra = f"  {res['bytes_per_course']} B/curso" if res.get("bytes_per_course") is not None else ""
+        print(f"[{i}/{len(cases)}] {_label(res):<48} {res['wall_s'] * 1000:10.2f} ms  "
+              f"RSS {res['peak_rss_mb']} MB  {res['output_bytes'] or '-'} B{extra}", flush=True)
+    return {
+        "meta": {
+            "suite": suite,
+            "repeat": repeat,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def _label(res: Dict[str, Any]) -> str:
+    value = {
+        "weeks": res["weeks"],
+        "courses": res["courses"],
+        "text_len": res["text_len"],
+        "density": res["holiday_density"],
+    }[res["axis"]]
+    return f"{res['exporter']} {res['axis']}={value}"
+
+
+def compare(before_path: str, after_path: str) -> None:
+    """Imprime la razón después/antes de tiempo y memoria para los casos comunes."""
+    with open(before_path, "r", encoding="utf-8") as f:
+        before = {_label(r): r for r in json.load(f)["results"]}
+    with open(after_path, "r", encoding="utf-8") as f:
+        after = {_label(r): r for r in json.load(f)["results"]}
+    print(f"{'caso':<48} {'antes ms':>10} {'después ms':>11} {'x':>6} {'RSS antes':>10} {'RSS desp.':>10}")
+    for label, a in after.items():
+        b = before.get(label)
+        if b is None:
+            continue
+        ratio = a["wall_s"] / b["wall_s"] if b["wall_s"] else float("nan")
+        print(f"{label:<48} {b['wall_s'] * 1000:10.2f} {a['wall_s'] * 1000:11.2f} {ratio:6.2f} "
+              f"{str(b['peak_rss_mb']):>10} {str(a['peak_rss_mb']):>10}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmarks del generador de calendario")
+    parser.add_argument("--suite", choices=sorted(SUITES), default="quick")
+    parser.add_argument("--repeat", type=int, default=3, help="repeticiones por caso (se toma la mejor)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos del modo por lotes")
+    parser.add_argument("--out", default="benchmark_resultados.json", help="archivo JSON de resultados")
+    parser.add_argument("--compare", nargs=2, metavar=("ANTES", "DESPUES"), help="compara dos resultados guardados")
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        compare(*args.compare)
+        return 0
+    data = run_suite(args.suite, max(1, args.repeat), args.workers)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=2)
+    print(f"Resultados guardados en {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -4,21 +4,64 @@ Generador de calendario de clases (GUI)
 Resumen de arquitectura
 - Capa de datos:
     - WeekDates: estructura con las fechas de cada semana (Lun/Mar/Mié) y el número de semana.
-    - compute_weeks(): calcula 18 semanas (o N) a partir de un lunes de inicio.
-    - get_colombia_holidays(): obtiene festivos en Colombia para el rango [inicio, fin]; usa la
-        librería "holidays" si está disponible, o un fallback mínimo para 2025.
+    - compute_weeks(): calcula 18 semanas (o N) a partir de un lunes de inicio; retorna una WeekTable
+        (secuencia compacta: sólo guarda el primer lunes y la cantidad).
+    - EntryTable/TOPICS: textos por semana codificados como enteros en una tabla de temas
+        compartida por todos los cursos del proceso (modo por lotes).
+    - get_colombia_holidays(): obtiene festivos en Colombia para el rango [inicio, fin]; los calcula
+        colombia_holidays() (fechas fijas, Pascua y traslado al lunes de la ley Emiliani) sin
+        dependencias. Los resultados se indexan por año en HOLIDAY_INDEX (memoria LRU); la librería
+        "holidays" queda como fuente opcional (CALENDARIO_HOLIDAYS_LIB=1, con caché JSON en disco).
+
+- Modelo de celdas:
+    - build_calendar_model(): clasifica cada sesión (normal/festivo/examen) con su encabezado y
+        texto fijo una sola vez por (semanas, festivos, exámenes); lo consumen la GUI y los exportadores.
 
 - Capa de exportación:
-    - build_excel(): genera un archivo .xlsx con una tabla por semana (encabezado + 4 columnas).
-    - build_pdf(): genera un PDF con tablas por semana (opcional; requiere reportlab).
+    - build_excel(): genera un archivo .xlsx con una tabla por semana (encabezado + 4 columnas);
+        con streaming=True usa un libro write-only de openpyxl (memoria constante) y con
+        engine="xlsxwriter" usa XlsxWriter en modo constant_memory.
+    - build_pdf(): genera un PDF con tablas por semana (opcional; requiere reportlab). Modos:
+        "platypus" (por defecto), "fast" (texto plano en celdas que no requieren ajuste) y
+        "canvas" (dibujo directo sin maquetación, para lotes grandes).
+    - build_ics()/build_ics_feed(): iCalendar con una cita por sesión (America/Bogota, sin
+        festivos); las líneas salen de un generador y se escriben a medida que se producen.
+    - iter_sessions()/write_sessions(): una fila por sesión (curso, semana, fecha, franja, horas,
+        estado, tema) en CSV o Parquet (pyarrow opcional), generadas y escritas por lotes.
+
+- Trazas de rendimiento:
+    - TRACER: spans por fase en los exportadores, festivos, _collect_entries() y el respaldo; se
+        activa con ``--trace`` o CALENDARIO_TRACE y escribe Chrome Trace o JSON Lines al salir.
+
+- Planificación vectorizada (opcional, numpy):
+    - plan_sessions(): fechas de sesión de muchos cursos como matrices datetime64 y máscaras de
+        festivos/exámenes con ``np.isin``. Es una API de planificación independiente (análisis
+        de lotes grandes, benchmark_calendario.py): los exportadores usan build_calendar_model().
+
+- Modo por lotes (sin GUI):
+    - run_batch(): lee un manifiesto JSON/CSV (mismos campos que el respaldo) y exporta cada curso
+        en un pool de procesos; se invoca con ``--batch`` desde main(). Con ``--merge-pdf`` une los
+        PDF de todos los cursos en uno solo con marcadores (merge_pdfs(), requiere pypdf) y con
+        ``--workbook`` escribe todos los cursos en un solo libro (build_workbook(): índice + una
+        hoja por curso, estilos compartidos y escritura en streaming). Con ``--cache`` los cursos
+        sin cambios se copian desde EXPORT_CACHE (clave SHA-256 de las entradas, LRU en disco) y con
+        ``--deterministic`` los mismos datos producen los mismos bytes (metadatos y fechas fijas).
+
+- Importación (ida y vuelta):
+    - read_excel(): lee en streaming (openpyxl read-only) un Excel exportado y editado y
+        reconstruye título, fechas, exámenes y entradas; ``--import-xlsx`` lo aplica al almacén.
 
 - Capa de presentación (GUI):
     - CalendarGUI (Tkinter): ofrece controles para título/subtítulo, fecha de inicio (con tkcalendar
         si está instalado) y número de semanas; muestra una grilla editable por semana y exporta a Excel/PDF.
+        La grilla es virtual: un pool de filas (_WeekRow) se reutiliza al desplazar y los textos
+        viven en CalendarGUI.entry_texts.
+    - CalendarStore: almacén SQLite de cursos (calendario.db) indexado por curso, semestre y fecha
+        de inicio; el autoguardado actualiza sólo las filas de las semanas editadas.
 
 Notas de mantenimiento
 - Si en el futuro se agregan más días (p. ej. Jueves/Viernes), modifica:
-    1) WeekDates (añadir campos o cambiar el diseño).
+    1) WeekDates (añadir campos o cambiar el diseño) y SESSIONS (columnas del modelo de celdas).
     2) _build_weeks_ui() para crear columnas y textos.
     3) build_excel()/build_pdf() para reflejar las nuevas columnas.
     4) _collect_entries() para devolver los nuevos textos.
@@ -27,9 +70,65 @@ Notas de mantenimiento
 import sys
 import os
 import json
-from datetime import date, timedelta
+import queue
+import re
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from collections.abc import Mapping as MappingABC, Sequence as SequenceABC
+from datetime import date, datetime, timedelta, timezone
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Tuple, Set
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Set
+
+_T0 = time.perf_counter()  # referencia de arranque para --startup-report
+
+
+class _ImportTimer:
+    """Mide importaciones al estilo de ``python -X importtime``.
+
+    Se instala envolviendo ``builtins.__import__`` sólo en modo --startup-report (también
+    funciona dentro del .exe de PyInstaller, donde no hay opciones -X).
+    """
+
+    def __init__(self) -> None:
+        import builtins
+
+        self._builtins = builtins
+        self._orig = builtins.__import__
+        self._stack: List[float] = []
+        self.rows: List[Tuple[int, str, float, float]] = []  # (profundidad, módulo, propio, acumulado)
+
+    def __call__(self, name: str, globals: Any = None, locals: Any = None, fromlist: Any = (), level: int = 0) -> Any:
+        if level == 0 and name in sys.modules:
+            return self._orig(name, globals, locals, fromlist, level)
+        depth = len(self._stack)
+        self._stack.append(0.0)
+        t = time.perf_counter()
+        try:
+            return self._orig(name, globals, locals, fromlist, level)
+        finally:
+            cumulative = time.perf_counter() - t
+            children = self._stack.pop()
+            if self._stack:
+                self._stack[-1] += cumulative
+            self.rows.append((depth, name, cumulative - children, cumulative))
+
+    def install(self) -> "_ImportTimer":
+        self._builtins.__import__ = self
+        return self
+
+    def uninstall(self) -> None:
+        self._builtins.__import__ = self._orig
+
+
+# Las importaciones de terceros (GUI, exportadores) quedan después para poder medirlas
+_IMPORT_TIMER = (
+    _ImportTimer().install()
+    if "--startup-report" in sys.argv or os.environ.get("CALENDARIO_STARTUP_REPORT")
+    else None
+)
 
 try:
     import tkinter as tk
@@ -44,55 +143,427 @@ try:
 except Exception:
     TKCAL_OK = False
 
-# Excel
-from openpyxl import Workbook
-from openpyxl.styles import Alignment, Font, PatternFill, Border, Side
-from openpyxl.utils import get_column_letter
+# Excel (openpyxl) y PDF (reportlab) se importan en el primer uso dentro de los
+# exportadores: no se necesitan para mostrar la ventana y son lo más pesado del arranque.
+_REPORTLAB_OK: Optional[bool] = None
+
+
+def reportlab_available() -> bool:
+    """Indica si reportlab está instalado; se resuelve en la primera consulta."""
+    global _REPORTLAB_OK
+    if _REPORTLAB_OK is None:
+        try:
+            import reportlab.platypus  # noqa: F401
+            _REPORTLAB_OK = True
+        except Exception:
+            _REPORTLAB_OK = False
+    return _REPORTLAB_OK
+
+
+def __getattr__(name: str) -> Any:
+    # Compatibilidad: ``REPORTLAB_OK`` sigue existiendo como atributo del módulo, resuelto bajo demanda.
+    if name == "REPORTLAB_OK":
+        return reportlab_available()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
-# Optional PDF
-try:
-    from reportlab.lib import colors
-    from reportlab.lib.pagesizes import A4, landscape
-    from reportlab.lib.styles import getSampleStyleSheet
-    from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-    REPORTLAB_OK = True
-except Exception:
-    REPORTLAB_OK = False
 
-# Optional Holidays (for Colombia)
-def _fallback_colombia_holidays_2025() -> Dict[date, str]:
-    """Minimal fallback for 2025 Colombian holidays that affect Aug–Dec period.
+# ---------- Trazas de rendimiento ----------
+class _Span:
+    """Intervalo medido por _Tracer.span(); se registra al salir del bloque ``with``."""
+    __slots__ = ("tracer", "name", "args", "t0")
 
-    This covers Monday-observed holidays within the semester window.
+    def __init__(self, tracer: "_Tracer", name: str, args: Dict[str, Any]) -> None:
+        self.tracer = tracer
+        self.name = name
+        self.args = args
+        self.t0 = 0.0
+
+    def __enter__(self) -> "_Span":
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.tracer._record(self.name, self.t0, time.perf_counter(), self.args)
+
+
+class _NoSpan:
+    """Span vacío que se usa cuando las trazas están apagadas (costo casi nulo)."""
+    __slots__ = ()
+
+    def __enter__(self) -> "_NoSpan":
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        return None
+
+
+_NO_SPAN = _NoSpan()
+
+
+class _Tracer:
+    """Registro de spans por fase (exportadores, festivos, respaldo).
+
+    Se activa con ``--trace [RUTA]`` o con la variable CALENDARIO_TRACE=<ruta>. Al terminar
+    el proceso escribe la traza: si la ruta termina en ``.json`` en formato Chrome Trace
+    (abrible en chrome://tracing o Perfetto) y si no, en JSON Lines; en ambos casos se
+    incluyen los agregados por fase (llamadas, total, media y máximo en ms).
     """
-    return {
-        date(2025, 8, 18): "Asunción de la Virgen (festivo)",
-        date(2025, 10, 13): "Día de la Raza (festivo)",
-        date(2025, 11, 3): "Día de Todos los Santos (festivo)",
-        date(2025, 11, 17): "Independencia de Cartagena (festivo)",
-        date(2025, 12, 8): "Inmaculada Concepción (festivo)",
-    }
 
+    def __init__(self) -> None:
+        self.path: Optional[str] = None
+        self._events: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+        # perf_counter() + desfase = microsegundos de época, comparables entre procesos
+        self._epoch_us = time.time() * 1e6 - time.perf_counter() * 1e6
+
+    @property
+    def enabled(self) -> bool:
+        return self.path is not None
+
+    def enable(self, path: str) -> None:
+        import atexit
+
+        if self.path is None:
+            atexit.register(self._write_at_exit)
+        self.path = path
+
+    def span(self, name: str, **args: Any) -> Any:
+        """Context manager que mide el bloque como la fase ``name`` (con ``args`` opcionales)."""
+        if self.path is None:
+            return _NO_SPAN
+        return _Span(self, name, args)
+
+    def _record(self, name: str, t0: float, t1: float, args: Dict[str, Any]) -> None:
+        event = {
+            "name": name,
+            "ts": round(self._epoch_us + t0 * 1e6, 1),
+            "dur": round((t1 - t0) * 1e6, 1),
+            "pid": os.getpid(),
+            "tid": threading.get_ident(),
+            "args": args,
+        }
+        with self._lock:
+            self._events.append(event)
+
+    def drain(self) -> List[Dict[str, Any]]:
+        """Retira los eventos de este proceso (los procesos del lote se los devuelven al padre)."""
+        pid = os.getpid()
+        with self._lock:
+            mine = [e for e in self._events if e["pid"] == pid]
+            self._events = [e for e in self._events if e["pid"] != pid]
+        return mine
+
+    def extend(self, events: List[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._events.extend(events)
+
+    def aggregates(self) -> Dict[str, Dict[str, float]]:
+        """Contadores por fase: llamadas, total_ms, mean_ms y max_ms."""
+        agg: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            events = list(self._events)
+        for e in events:
+            a = agg.setdefault(e["name"], {"count": 0, "total_ms": 0.0, "max_ms": 0.0})
+            ms = e["dur"] / 1000
+            a["count"] += 1
+            a["total_ms"] += ms
+            a["max_ms"] = max(a["max_ms"], ms)
+        for a in agg.values():
+            a["mean_ms"] = round(a["total_ms"] / a["count"], 3)
+            a["total_ms"] = round(a["total_ms"], 3)
+            a["max_ms"] = round(a["max_ms"], 3)
+        return agg
+
+    def write(self, path: Optional[str] = None) -> None:
+        path = path or self.path
+        if not path:
+            return
+        with self._lock:
+            events = sorted(self._events, key=lambda e: e["ts"])
+        agg = self.aggregates()
+        if path.lower().endswith(".json"):
+            write_json_atomic(path, {
+                "traceEvents": [dict(e, ph="X", cat="calendario") for e in events],
+                "displayTimeUnit": "ms",
+                "otherData": {"aggregates": agg},
+            })
+            return
+        with open(path, "w", encoding="utf-8") as f:
+            for e in events:
+                f.write(json.dumps(dict(e, type="span"), ensure_ascii=False) + "\n")
+            for name, a in sorted(agg.items()):
+                f.write(json.dumps(dict(a, type="aggregate", name=name), ensure_ascii=False) + "\n")
 
-def get_colombia_holidays(start: date, end: date) -> Dict[date, str]:
-    """Return a dict of holiday_date -> holiday_name for Colombia within range.
+    def _write_at_exit(self) -> None:
+        import multiprocessing
 
-    Tries the 'holidays' package; falls back to a minimal 2025 set.
+        # Sólo el proceso principal escribe; los del lote entregan sus eventos con drain()
+        if multiprocessing.parent_process() is not None:
+            return
+        try:
+            self.write()
+        except Exception as e:
+            print(f"No se pudo escribir la traza en {self.path}: {e}", file=sys.stderr)
+
+
+TRACER = _Tracer()
+if os.environ.get("CALENDARIO_TRACE"):
+    TRACER.enable(os.environ["CALENDARIO_TRACE"])
+
+
+# ---------- Festivos de Colombia (motor propio, sin dependencias) ----------
+# Ley 51 de 1983 ("ley Emiliani"): desde 1984 varios festivos se trasladan al lunes siguiente.
+_EMILIANI_FROM = 1984
+# Fechas fijas: (mes, día, nombre, se traslada al lunes, vigente desde)
+_CO_FIXED = (
+    (1, 1, "Año Nuevo", False, 0),
+    (1, 6, "Día de los Reyes Magos", True, 1951),
+    (3, 19, "Día de San José", True, 1951),
+    (5, 1, "Día del Trabajo", False, 0),
+    (6, 29, "San Pedro y San Pablo", True, 1951),
+    (7, 9, "Día de Nuestra Señora del Rosario de Chiquinquirá", True, 2026),  # Ley 2578 de 2026
+    (7, 20, "Día de la Independencia", False, 0),
+    (8, 7, "Batalla de Boyacá", False, 0),
+    (8, 15, "La Asunción", True, 1951),
+    (10, 12, "Día de la Raza", True, 0),
+    (11, 1, "Día de Todos los Santos", True, 1951),
+    (11, 11, "Independencia de Cartagena", True, 0),
+    (12, 8, "La Inmaculada Concepción", False, 1951),
+    (12, 25, "Navidad", False, 0),
+)
+# Relativos al Domingo de Pascua: (desplazamiento en días, nombre, se traslada al lunes, vigente desde)
+_CO_EASTER = (
+    (-3, "Jueves Santo", False, 1951),
+    (-2, "Viernes Santo", False, 1951),
+    (39, "Ascensión del señor", True, 1951),
+    (60, "Corpus Christi", True, 1951),
+    (68, "Sagrado Corazón", True, _EMILIANI_FROM),
+)
+
+
+def easter_sunday(year: int) -> date:
+    """Domingo de Pascua (calendario gregoriano) con el algoritmo anónimo de Meeus/Jones/Butcher."""
+    a = year % 19
+    b, c = divmod(year, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    month, day = divmod(h + l - 7 * m + 114, 31)
+    return date(year, month, day + 1)
+
+
+def colombia_holidays(year: int) -> Dict[date, str]:
+    """Festivos de Colombia de ``year`` calculados sin la librería ``holidays``.
+
+    Aplica fechas fijas, fechas relativas a la Pascua y el traslado al lunes de la ley
+    Emiliani (desde 1984). Los nombres coinciden con los de ``holidays`` (incluido el
+    sufijo "(observado)" y la unión con "; " si dos festivos caen el mismo lunes), de modo
+    que ambas fuentes producen exactamente el mismo resultado.
     """
+    emiliani = year >= _EMILIANI_FROM
+    easter = easter_sunday(year)
+    rules = [(date(year, m, d), name, monday) for m, d, name, monday, since in _CO_FIXED if year >= since]
+    rules += [(easter + timedelta(days=off), name, monday) for off, name, monday, since in _CO_EASTER if year >= since]
+
+    names: Dict[date, List[str]] = {}
+    for d, name, monday in rules:
+        if monday and emiliani and d.weekday() != 0:
+            d += timedelta(days=7 - d.weekday())
+            name += " (observado)"
+        names.setdefault(d, []).append(name)
+    return {d: "; ".join(sorted(ns)) for d, ns in sorted(names.items())}
+
+
+def write_json_atomic(path: str, data: Any, indent: Optional[int] = None) -> None:
+    """Escribe ``data`` como JSON de forma atómica (archivo temporal + rename).
+
+    Si el proceso se interrumpe a mitad de escritura, el archivo anterior queda intacto.
+    """
+    tmp = f"{path}.{os.getpid()}.tmp"
     try:
-        import holidays  # type: ignore
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+class _BackupWriter:
+    """Hilo que guarda el respaldo fuera del hilo de Tk con la función ``write``.
+
+    Las escrituras pendientes se combinan: si llegan varias antes de que el hilo termine,
+    la cabecera (``course``) más reciente reemplaza a la anterior y las semanas (``weeks``)
+    se acumulan, así que ninguna fila editada se pierde. ``replace=True`` (todas las
+    semanas) descarta las semanas pendientes anteriores.
+    """
+
+    def __init__(self, write: Callable[[Dict[str, Any]], None]) -> None:
+        self._write = write
+        self._cond = threading.Condition()
+        self._pending: Optional[Dict[str, Any]] = None
+        self._busy = False
+        self._thread: Optional[threading.Thread] = None
+        self.error: Optional[Exception] = None
+
+    def submit(self, data: Dict[str, Any]) -> None:
+        with self._cond:
+            old = self._pending
+            if old is not None and not data.get("replace"):
+                data = dict(data, weeks={**old["weeks"], **data["weeks"]}, replace=old.get("replace", False))
+            self._pending = data
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="calendario-backup", daemon=True)
+                self._thread.start()
+            self._cond.notify_all()
+
+    def wait(self, timeout: Optional[float] = None) -> None:
+        """Bloquea hasta que no queden escrituras pendientes."""
+        with self._cond:
+            self._cond.wait_for(lambda: self._pending is None and not self._busy, timeout)
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending is not None)
+                data = self._pending
+                self._pending = None
+                self._busy = True
+            try:
+                with TRACER.span("backup.write", weeks=len(data["weeks"])):  # type: ignore[index]
+                    self._write(data)  # type: ignore[arg-type]
+                self.error = None
+            except Exception as e:
+                self.error = e
+            with self._cond:
+                self._busy = False
+                self._cond.notify_all()
+
+
+class _HolidayIndex:
+    """Índice de festivos por año, compartido por todo el proceso.
+
+    Cada año se guarda como dos listas paralelas ordenadas (fechas, nombres), de modo que
+    una consulta por rango es un par de ``bisect``. Los años se expulsan en orden LRU al
+    superar ``max_years``, salvo los del rango que se está consultando. La fuente es colombia_holidays(); con ``use_library=True`` se usa
+    la librería ``holidays`` (si está instalada) y, si se indica ``cache_path``, sus años se
+    persisten en un JSON local para no reconstruirlos en el siguiente arranque.
+    """
 
-        co = holidays.country_holidays("CO", years={start.year, end.year})
+    def __init__(self, max_years: int = 32, cache_path: Optional[str] = None, use_library: bool = False) -> None:
+        self.max_years = max_years
+        self.cache_path = cache_path
+        self.use_library = use_library
+        self._years: "OrderedDict[int, Tuple[List[date], List[str]]]" = OrderedDict()
+        self._disk: Optional[Dict[str, List[List[str]]]] = None
+        self._lock = threading.Lock()
+
+    def _read_disk(self) -> Dict[str, List[List[str]]]:
+        if self._disk is None:
+            self._disk = {}
+            if self.cache_path and os.path.exists(self.cache_path):
+                try:
+                    with open(self.cache_path, "r", encoding="utf-8") as f:
+                        self._disk = json.load(f)
+                except Exception:
+                    self._disk = {}
+        return self._disk
+
+    def _write_disk(self) -> None:
+        if not self.cache_path or self._disk is None:
+            return
+        try:
+            write_json_atomic(self.cache_path, self._disk)
+        except Exception:
+            pass
+
+    def _build_year(self, year: int) -> Tuple[List[date], List[str]]:
+        with TRACER.span("holidays.build_year", year=year) as span:
+            cached = self._read_disk().get(str(year)) if self.use_library else None
+            pairs: List[Tuple[date, str]] = []
+            source = "builtin"
+            if cached:
+                pairs = [(date.fromisoformat(d), n) for d, n in cached]
+                source = "disk"
+            elif self.use_library:
+                try:
+                    import holidays  # type: ignore
+
+                    pairs = [(d, str(n)) for d, n in holidays.country_holidays("CO", years=year).items()]
+                    self._read_disk()[str(year)] = [[d.isoformat(), n] for d, n in sorted(pairs)]
+                    self._write_disk()
+                    source = "holidays"
+                except Exception:
+                    pass  # sin la librería se usa el motor propio
+            if source == "builtin":
+                # El motor propio no necesita caché en disco: calcular un año toma microsegundos.
+                pairs = list(colombia_holidays(year).items())
+            if TRACER.enabled:
+                span.args["source"] = source
+            pairs.sort()
+            return [d for d, _ in pairs], [n for _, n in pairs]
+
+    def year(self, year: int, keep: range = range(0)) -> Tuple[List[date], List[str]]:
+        """Retorna (fechas, nombres) ordenados del año, construyéndolo si no está en memoria.
+
+        Los años de ``keep`` no se expulsan aunque el índice supere ``max_years``.
+        """
+        with self._lock:
+            hit = self._years.get(year)
+            if hit is not None:
+                self._years.move_to_end(year)
+                return hit
+            built = self._build_year(year)
+            self._years[year] = built
+            excess = len(self._years) - self.max_years
+            if excess > 0:
+                # Una consulta más larga que max_years no descarta los años que acaba de cargar;
+                # el exceso se recorta en la siguiente consulta que cargue otro año
+                for y in [y for y in self._years if y not in keep][:excess]:
+                    del self._years[y]
+            return built
+
+    def range(self, start: date, end: date) -> Dict[date, str]:
+        """Festivos en [start, end] como dict fecha -> nombre."""
         out: Dict[date, str] = {}
-        d = start
-        while d <= end:
-            if d in co:
-                out[d] = str(co.get(d))
-            d += timedelta(days=1)
+        years = range(start.year, end.year + 1)
+        for y in years:
+            dates, names = self.year(y, years)
+            lo = bisect_left(dates, start)
+            hi = bisect_right(dates, end)
+            for i in range(lo, hi):
+                out[dates[i]] = names[i]
         return out
-    except Exception:
-        fallback = _fallback_colombia_holidays_2025()
-        return {k: v for k, v in fallback.items() if start <= k <= end}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._years.clear()
+
+
+# Índice global. CALENDARIO_HOLIDAYS_LIB=1 usa la librería ``holidays`` en lugar del motor propio
+# y CALENDARIO_HOLIDAYS_CACHE=<ruta.json> persiste en disco lo que ella calcule.
+HOLIDAY_INDEX = _HolidayIndex(
+    cache_path=os.environ.get("CALENDARIO_HOLIDAYS_CACHE") or None,
+    use_library=os.environ.get("CALENDARIO_HOLIDAYS_LIB") == "1",
+)
+
+
+def get_colombia_holidays(start: date, end: date) -> Dict[date, str]:
+    """Return a dict of holiday_date -> holiday_name for Colombia within range.
+
+    Uses the process-wide ``HOLIDAY_INDEX``, built once per year by the dependency-free
+    colombia_holidays() rule engine (or by the 'holidays' package when opted in).
+    """
+    if end < start:
+        return {}
+    with TRACER.span("holidays.range"):
+        return HOLIDAY_INDEX.range(start, end)
 
 
 SPANISH_MONTHS = {
@@ -100,6 +571,21 @@ SPANISH_MONTHS = {
     7: "Julio", 8: "Agosto", 9: "Septiembre", 10: "Octubre", 11: "Noviembre", 12: "Diciembre",
 }
 
+
+class ExportCancelled(Exception):
+    """Se lanza desde un callback de progreso para detener una exportación en curso."""
+
+
+# progress(hechas, total) de build_excel()/build_pdf()
+ProgressCallback = Callable[[int, int], None]
+
+# Espera tras la última edición antes de autoguardar el respaldo
+AUTOSAVE_DELAY_MS = 1500
+# Semanas permitidas por curso (dos años): tope del Spinbox y de los manifiestos del modo por lotes
+MAX_WEEKS = 104
+# Frecuencia con la que la GUI revisa el avance de una exportación en segundo plano
+EXPORT_POLL_MS = 100
+
 # Horarios fijos por día/sesión
 CLASS_TIMES = {
     "lunes": "2:00 pm - 4:00 pm",
@@ -109,7 +595,7 @@ CLASS_TIMES = {
 }
 
 
-@dataclass
+@dataclass(slots=True)
 class WeekDates:
     semana: int
     lunes: date
@@ -117,22 +603,494 @@ class WeekDates:
     miercoles: date
 
 
-def compute_weeks(start_monday: date, weeks: int = 18) -> List[WeekDates]:
-    """Calcula un arreglo de WeekDates a partir de un lunes de inicio.
+class WeekTable(SequenceABC):
+    """Secuencia de semanas consecutivas guardada como (primer lunes, cantidad, primera semana).
+
+    Las semanas forman una progresión exacta, así que no se almacena un WeekDates por
+    semana: cada uno se arma al accederlo. Ocupa lo mismo con 18 que con 5.000 semanas y
+    se comporta como una lista de sólo lectura (índices negativos, slicing, iteración).
+    """
+    __slots__ = ("start", "count", "first_week")
+
+    def __init__(self, start: date, count: int, first_week: int = 1) -> None:
+        self.start = start
+        self.count = max(0, count)
+        self.first_week = first_week
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            r = range(self.count)[index]
+            if r.step == 1:
+                return WeekTable(self.start + timedelta(weeks=r.start), len(r), self.first_week + r.start)
+            return [self[i] for i in r]
+        i = range(self.count)[index]  # IndexError y negativos como en una lista
+        mon = self.start + timedelta(weeks=i)
+        return WeekDates(self.first_week + i, mon, mon + timedelta(days=1), mon + timedelta(days=2))
+
+    def __eq__(self, other: object) -> bool:
+        if isinstance(other, WeekTable):
+            return (self.start, self.count, self.first_week) == (other.start, other.count, other.first_week)
+        if isinstance(other, list):
+            return list(self) == other
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"WeekTable({self.start!r}, {self.count}, first_week={self.first_week})"
+
+
+def compute_weeks(start_monday: date, weeks: int = 18, first_week: int = 1) -> WeekTable:
+    """Calcula las semanas de clase a partir de un lunes de inicio.
 
     Parámetros
     - start_monday: fecha que debe ser lunes (weekday()==0).
     - weeks: cantidad de semanas a generar.
+    - first_week: número de la primera semana generada (para extender un calendario existente).
 
     Retorna
-    - Lista de WeekDates con (semana, lunes, martes, miércoles) por cada semana.
+    - WeekTable: secuencia de WeekDates (semana, lunes, martes, miércoles), sin costo por semana.
     """
     if start_monday.weekday() != 0:
         raise ValueError("La fecha de inicio debe ser un lunes")
-    out: List[WeekDates] = []
-    for i in range(weeks):
-        mon = start_monday + timedelta(weeks=i)
-        out.append(WeekDates(semana=i + 1, lunes=mon, martes=mon + timedelta(days=1), miercoles=mon + timedelta(days=2)))
+    return WeekTable(start_monday, weeks, first_week)
+
+
+# ---------- Textos de las sesiones (tabla de temas compartida) ----------
+class TopicTable:
+    """Diccionario de textos compartido por todos los cursos de un proceso.
+
+    Cada texto distinto ("Sesión por confirmar", "Laboratorio 2", ...) se guarda una sola
+    vez y se referencia con un código entero; el código 0 es siempre el texto vacío.
+    """
+
+    def __init__(self) -> None:
+        self._texts: List[str] = [""]
+        self._codes: Dict[str, int] = {"": 0}
+        self._lock = threading.Lock()
+
+    def encode(self, text: str) -> int:
+        code = self._codes.get(text)
+        if code is None:
+            with self._lock:
+                code = self._codes.get(text)
+                if code is None:
+                    code = len(self._texts)
+                    self._texts.append(text)
+                    self._codes[text] = code
+        return code
+
+    def decode(self, code: int) -> str:
+        return self._texts[code]
+
+    def __len__(self) -> int:
+        return len(self._texts)
+
+    def nbytes(self) -> int:
+        """Memoria aproximada de la tabla (textos + índices)."""
+        return sys.getsizeof(self._texts) + sys.getsizeof(self._codes) + sum(sys.getsizeof(t) for t in self._texts)
+
+
+TOPICS = TopicTable()
+
+
+class EntryTable(MappingABC):
+    """Textos de un curso como ``semana -> (lun, mar, mié1, mié2)`` codificados en TOPICS.
+
+    Se usa igual que el ``Dict[int, Tuple[str, str, str, str]]`` que esperan los exportadores,
+    pero guarda 4 códigos enteros por semana en un ``array`` (16 bytes) en lugar de una
+    tupla de cadenas propias por semana. Las semanas se numeran desde 1.
+    """
+    __slots__ = ("_codes", "_present", "_topics")
+
+    def __init__(self, topics: Optional[TopicTable] = None) -> None:
+        self._codes = array("I")
+        self._present = bytearray()
+        self._topics = topics or TOPICS
+
+    @classmethod
+    def from_mapping(cls, entries: Any, topics: Optional[TopicTable] = None) -> "EntryTable":
+        table = cls(topics)
+        for semana, texts in dict(entries).items():
+            table[semana] = texts
+        return table
+
+    def __setitem__(self, semana: int, texts: Sequence[str]) -> None:
+        semana = int(semana)
+        if semana < 1:
+            raise ValueError(f"Número de semana inválido: {semana}")
+        texts = list(texts)
+        if len(texts) > 4:
+            # Más de 4 textos pisarían las celdas de la semana siguiente
+            raise ValueError(f"La semana {semana} tiene {len(texts)} textos (máximo 4)")
+        texts += [""] * (4 - len(texts))
+        if semana > len(self._present):
+            grow = semana - len(self._present)
+            self._codes.extend([0] * (4 * grow))
+            self._present.extend(bytes(grow))
+        base = (semana - 1) * 4
+        for i, txt in enumerate(texts):
+            self._codes[base + i] = self._topics.encode(txt or "")
+        self._present[semana - 1] = 1
+
+    def __getitem__(self, semana: int) -> Tuple[str, str, str, str]:
+        if not isinstance(semana, int) or not 1 <= semana <= len(self._present) or not self._present[semana - 1]:
+            raise KeyError(semana)
+        base = (semana - 1) * 4
+        decode = self._topics.decode
+        codes = self._codes
+        return (decode(codes[base]), decode(codes[base + 1]), decode(codes[base + 2]), decode(codes[base + 3]))
+
+    def __iter__(self) -> Any:
+        return (i + 1 for i, flag in enumerate(self._present) if flag)
+
+    def __len__(self) -> int:
+        return sum(self._present)
+
+    def __reduce__(self) -> Any:
+        # Al enviarla a otro proceso viajan los textos, no la tabla compartida completa
+        return (EntryTable.from_mapping, (dict(self.items()),))
+
+    def nbytes(self) -> int:
+        """Memoria propia del curso (sin contar los textos compartidos de TOPICS)."""
+        return sys.getsizeof(self._codes) + sys.getsizeof(self._present)
+
+
+# ---------- Modelo de celdas (compartido por GUI, Excel y PDF) ----------
+CELL_NORMAL = "normal"
+CELL_HOLIDAY = "holiday"
+CELL_EXAM = "exam"
+
+# Columnas de cada semana: (atributo de WeekDates, nombre, clave de CLASS_TIMES, admite examen)
+SESSIONS = (
+    ("lunes", "Lunes", "lunes", False),
+    ("martes", "Martes", "martes", False),
+    ("miercoles", "Miércoles 1", "miercoles_1", False),
+    # Only mark exams for Wednesday Session 2 (2:00 pm - 5:00 pm)
+    ("miercoles", "Miércoles 2", "miercoles_2", True),
+)
+
+
+class CalendarCell:
+    """Una sesión de la grilla ya clasificada (normal/festivo/examen)."""
+    __slots__ = ("day", "kind", "label", "header")
+
+    def __init__(self, day: date, kind: str, label: str, header: str) -> None:
+        self.day = day
+        self.kind = kind
+        self.label = label    # texto fijo: "Festivo: …\nNo hay clase", "Examen" o ""
+        self.header = header  # "Lunes 2:00 pm - 4:00 pm 18/08"
+
+    def text(self, txt: str) -> str:
+        """Texto final de la celda combinando la clasificación con lo escrito por el usuario."""
+        if self.kind == CELL_HOLIDAY:
+            return self.label
+        if self.kind == CELL_EXAM:
+            return self.label + (f"\n{txt}" if txt else "")
+        return txt or ""
+
+
+class CalendarWeek:
+    """Una semana del modelo: título, rango para la GUI y sus 4 celdas."""
+    __slots__ = ("semana", "title", "range_label", "cells")
+
+    def __init__(self, semana: int, title: str, range_label: str, cells: Tuple[CalendarCell, ...]) -> None:
+        self.semana = semana
+        self.title = title              # "SEMANA 1 Agosto"
+        self.range_label = range_label  # "1 (18/08 - 20/08)"
+        self.cells = cells
+
+
+def _model_week(wd: WeekDates, holidays_map: Dict[date, str], exam_dates: Set[date]) -> CalendarWeek:
+    cells: List[CalendarCell] = []
+    for attr, name, slot, allow_exam in SESSIONS:
+        d = getattr(wd, attr)
+        header = f"{name} {CLASS_TIMES[slot]} {d.strftime('%d/%m')}"
+        if d in holidays_map:
+            cells.append(CalendarCell(d, CELL_HOLIDAY, f"Festivo: {holidays_map[d]}\nNo hay clase", header))
+        elif allow_exam and d in exam_dates:
+            cells.append(CalendarCell(d, CELL_EXAM, "Examen", header))
+        else:
+            cells.append(CalendarCell(d, CELL_NORMAL, "", header))
+    return CalendarWeek(
+        wd.semana,
+        f"SEMANA {wd.semana} {SPANISH_MONTHS[wd.lunes.month]}",
+        f"{wd.semana} ({wd.lunes.strftime('%d/%m')} - {wd.miercoles.strftime('%d/%m')})",
+        tuple(cells),
+    )
+
+
+_MODEL_CACHE: "OrderedDict[Any, Tuple[CalendarWeek, ...]]" = OrderedDict()
+_MODEL_CACHE_SIZE = 64
+# La GUI y el hilo de exportación consultan la caché a la vez: lecturas y expulsiones bajo lock
+_MODEL_LOCK = threading.Lock()
+
+
+def build_calendar_model(
+    week_dates: Sequence[WeekDates],
+    holidays_map: Dict[date, str],
+    exam_dates: Set[date],
+) -> Tuple[CalendarWeek, ...]:
+    """Clasifica una sola vez cada celda del calendario.
+
+    El resultado depende sólo de (semanas, festivos, exámenes), no de los textos, por lo
+    que se memoriza y se reutiliza entre la GUI y los exportadores. Es inmutable por
+    convención: los renderizadores sólo lo leen.
+    """
+    key = (
+        tuple((wd.semana, wd.lunes) for wd in week_dates),
+        tuple(sorted(holidays_map.items())),
+        frozenset(exam_dates),
+    )
+    with _MODEL_LOCK:
+        hit = _MODEL_CACHE.get(key)
+        if hit is not None:
+            _MODEL_CACHE.move_to_end(key)
+            return hit
+
+    # La clasificación no toca la caché: se hace fuera del lock
+    weeks = [_model_week(wd, holidays_map, exam_dates) for wd in week_dates]
+    out = tuple(weeks)
+    with _MODEL_LOCK:
+        out = _MODEL_CACHE.setdefault(key, out)
+        _MODEL_CACHE.move_to_end(key)
+        while len(_MODEL_CACHE) > _MODEL_CACHE_SIZE:
+            _MODEL_CACHE.popitem(last=False)
+    return out
+
+
+def update_calendar_model(
+    model: Sequence[CalendarWeek],
+    week_dates: Sequence[WeekDates],
+    holidays_map: Dict[date, str],
+    exam_dates: Set[date],
+    changed: Set[int],
+) -> Tuple[CalendarWeek, ...]:
+    """Actualiza un modelo existente re-clasificando sólo lo necesario.
+
+    Reutiliza las semanas de ``model`` cuyo número no esté en ``changed`` y clasifica de
+    nuevo las semanas cambiadas y las que no existían (``week_dates`` más largo).
+    """
+    out = list(model[:len(week_dates)])
+    for semana in changed:
+        if 1 <= semana <= len(out):
+            out[semana - 1] = _model_week(week_dates[semana - 1], holidays_map, exam_dates)
+    for wd in week_dates[len(out):]:
+        out.append(_model_week(wd, holidays_map, exam_dates))
+    return tuple(out)
+
+
+# ---------- Planificación vectorizada (NumPy, opcional) ----------
+# numpy sólo se importa al planificar muchos cursos a la vez; la GUI y los exportadores no lo usan.
+_NUMPY_OK: Optional[bool] = None
+
+# Códigos de SessionPlan.kinds (índices de esta tupla)
+KIND_CODES = (CELL_NORMAL, CELL_HOLIDAY, CELL_EXAM)
+# Día de la semana de cada campo de WeekDates, relativo al lunes
+_SESSION_OFFSETS = {"lunes": 0, "martes": 1, "miercoles": 2}
+# Días datetime64 (desde 1970-01-01) + _EPOCH_ORDINAL = date.toordinal() (siempre >= 1)
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+# Más días que los que hay entre los años 1 y 9999: separa las claves (curso, día) sin choques
+_EXAM_KEY_STRIDE = 1 << 22
+
+
+def numpy_available() -> bool:
+    """Indica si numpy está instalado; se resuelve en la primera consulta."""
+    global _NUMPY_OK
+    if _NUMPY_OK is None:
+        try:
+            import numpy  # noqa: F401
+            _NUMPY_OK = True
+        except Exception:
+            _NUMPY_OK = False
+    return _NUMPY_OK
+
+
+@dataclass
+class SessionPlan:
+    """Sesiones de varios cursos como matrices NumPy de forma (cursos, semanas_max, sesiones).
+
+    Las columnas siguen SESSIONS. ``dates`` es datetime64[D] (NaT en semanas que el curso no
+    tiene), ``valid`` marca las semanas existentes, ``holiday``/``exam`` son máscaras con la
+    misma prioridad que build_calendar_model() y ``kinds`` guarda índices de KIND_CODES.
+    ``unmatched_exams`` lista (curso, fecha) de exámenes que no caen en ninguna sesión de examen.
+    """
+    dates: Any
+    valid: Any
+    holiday: Any
+    exam: Any
+    kinds: Any
+    unmatched_exams: List[Tuple[int, date]]
+
+
+def plan_sessions(
+    starts: Sequence[date],
+    weeks: Sequence[int],
+    exam_dates: Optional[Sequence[Set[date]]] = None,
+    holidays_map: Optional[Dict[date, str]] = None,
+) -> SessionPlan:
+    """Calcula fechas y festivos/exámenes de muchos cursos con operaciones de arreglo.
+
+    Equivale a compute_weeks() + build_calendar_model() por curso, pero sin objetos por
+    celda: las fechas salen de un broadcast (inicio + 7·semana + día) y las máscaras de
+    ``np.isin``. Los exámenes se comparan como claves (curso, día) para que cada curso
+    use sólo sus fechas. Si ``holidays_map`` es None se consulta get_colombia_holidays()
+    para todo el rango de una vez. Requiere numpy (RuntimeError controlado si falta).
+    No forma parte de la exportación: es para analizar lotes completos de una vez.
+    """
+    if not numpy_available():
+        raise RuntimeError("NumPy no está instalado. Instálalo para la planificación vectorizada.")
+    import numpy as np
+
+    n = len(starts)
+    base = np.array(starts, dtype="datetime64[D]").astype(np.int64).reshape(n)
+    # 1970-01-01 fue jueves: (días + 3) % 7 == 0 ⇔ lunes
+    bad = np.flatnonzero((base + 3) % 7)
+    if bad.size:
+        raise ValueError(f"La fecha de inicio debe ser un lunes (curso {int(bad[0])}: {starts[int(bad[0])]})")
+    counts = np.asarray(weeks, dtype=np.int64).reshape(n)
+    width = int(counts.max()) if n else 0
+    offsets = np.array([_SESSION_OFFSETS[attr] for attr, *_ in SESSIONS], dtype=np.int64)
+    allow_exam = np.array([allow for *_, allow in SESSIONS], dtype=bool)
+
+    days = base[:, None, None] + 7 * np.arange(width, dtype=np.int64)[None, :, None] + offsets[None, None, :]
+    valid = np.arange(width)[None, :] < counts[:, None]
+    cell_valid = np.broadcast_to(valid[:, :, None], days.shape)
+
+    if holidays_map is None:
+        holidays_map = {}
+        if n and width:
+            first = date.fromordinal(int(base.min()) + _EPOCH_ORDINAL)
+            last = date.fromordinal(int(days[cell_valid].max()) + _EPOCH_ORDINAL)
+            holidays_map = get_colombia_holidays(first, last)
+    hol_days = np.array(sorted(holidays_map), dtype="datetime64[D]").astype(np.int64)
+    holiday = np.isin(days, hol_days) & cell_valid
+
+    # Claves (curso, día): el día se corre para que sea >= 0 y quepa en _EXAM_KEY_STRIDE
+    course = np.arange(n, dtype=np.int64)[:, None, None]
+    keys = course * _EXAM_KEY_STRIDE + (days + _EPOCH_ORDINAL)
+    exam_list = [(i, d) for i, ds in enumerate(exam_dates or ()) for d in sorted(ds)]
+    exam_keys = np.array([i * _EXAM_KEY_STRIDE + d.toordinal() for i, d in exam_list], dtype=np.int64)
+    exam_cells = np.isin(keys, exam_keys) & cell_valid & allow_exam[None, None, :]
+    exam = exam_cells & ~holiday
+    matched = np.isin(exam_keys, keys[exam_cells])
+    unmatched = [exam_list[i] for i in np.flatnonzero(~matched)]
+
+    kinds = np.zeros(days.shape, dtype=np.int8)
+    kinds[exam] = KIND_CODES.index(CELL_EXAM)
+    kinds[holiday] = KIND_CODES.index(CELL_HOLIDAY)
+    dates = np.where(cell_valid, days, np.iinfo(np.int64).min).astype("datetime64[D]")
+    return SessionPlan(dates=dates, valid=valid, holiday=holiday, exam=exam, kinds=kinds, unmatched_exams=unmatched)
+
+
+def _excel_styles() -> Dict[str, Dict[str, Any]]:
+    """Conjunto fijo de estilos del calendario en Excel (se crea una sola vez por proceso).
+
+    Cada entrada agrupa los atributos de un tipo de celda para que ambos modos de
+    build_excel() compartan exactamente el mismo aspecto.
+    """
+    global _EXCEL_STYLES
+    if _EXCEL_STYLES is None:
+        from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
+
+        thin = Side(border_style="thin", color="000000")
+        border = Border(top=thin, left=thin, right=thin, bottom=thin)
+        align_center = Alignment(horizontal="center", vertical="center")
+        align_wrap = Alignment(wrap_text=True, vertical="top")
+        _EXCEL_STYLES = {
+            "title": {"font": Font(bold=True, size=14), "alignment": align_center},
+            "subtitle": {"font": Font(bold=False, size=12), "alignment": align_center},
+            "week": {"font": Font(bold=True, size=12), "alignment": align_center},
+            "day": {"font": Font(bold=True), "alignment": align_center, "border": border},
+            "normal": {"alignment": align_wrap, "border": border},
+            # Colors: holidays light green, exams light orange
+            "holiday": {"alignment": align_wrap, "border": border, "fill": PatternFill("solid", fgColor="C6EFCE")},
+            "exam": {"alignment": align_wrap, "border": border, "fill": PatternFill("solid", fgColor="F8CBAD")},
+        }
+    return _EXCEL_STYLES
+
+
+_EXCEL_STYLES: Optional[Dict[str, Dict[str, Any]]] = None
+
+# Anchos de columna comunes a todos los modos de build_excel()
+_EXCEL_WIDTHS = [22, 22, 22, 22, 1, 1]
+
+# Fecha de los metadatos en modo determinista si no hay SOURCE_DATE_EPOCH: 2000-01-01 UTC,
+# la misma que usa ReportLab con ``invariant``
+_DETERMINISTIC_EPOCH = 946684800
+
+
+def _deterministic_datetime() -> datetime:
+    """Fecha fija (UTC, sin zona) para los metadatos; respeta SOURCE_DATE_EPOCH si está definida."""
+    raw = os.environ.get("SOURCE_DATE_EPOCH", "").strip()
+    when = datetime.fromtimestamp(int(raw) if raw else _DETERMINISTIC_EPOCH, tz=timezone.utc)
+    return max(when.replace(tzinfo=None), datetime(1980, 1, 1))  # mínimo que admite un ZIP
+
+
+def _normalize_zip(path: str, when: datetime, replace: Optional[Dict[str, bytes]] = None) -> None:
+    """Reescribe un .xlsx con fecha ``when`` y permisos fijos en cada miembro del ZIP.
+
+    openpyxl guarda la hora actual (o el mtime de sus temporales) en cada entrada del ZIP.
+    El orden de los miembros se conserva; ``replace`` cambia el contenido de los indicados.
+    """
+    import zipfile
+
+    tmp = f"{path}.{os.getpid()}.zip"
+    try:
+        with zipfile.ZipFile(path) as src, zipfile.ZipFile(tmp, "w", zipfile.ZIP_DEFLATED) as dst:
+            for info in src.infolist():
+                fixed = zipfile.ZipInfo(info.filename, date_time=when.timetuple()[:6])
+                fixed.compress_type = zipfile.ZIP_DEFLATED
+                fixed.external_attr = 0o644 << 16
+                dst.writestr(fixed, (replace or {}).get(info.filename) or src.read(info))
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _save_openpyxl(wb: Any, path: str, deterministic: bool) -> None:
+    """wb.save() y, en modo determinista, metadatos y fechas del ZIP fijos."""
+    if not deterministic:
+        wb.save(path)
+        return
+    from openpyxl.xml.constants import ARC_CORE
+    from openpyxl.xml.functions import tostring
+
+    when = _deterministic_datetime()
+    wb.properties.created = when
+    wb.save(path)
+    wb.properties.modified = when  # save() la reemplaza por la hora actual
+    _normalize_zip(path, when, {ARC_CORE: tostring(wb.properties.to_tree())})
+
+
+# Motores de build_excel(): openpyxl (por defecto) o xlsxwriter en modo constant_memory
+EXCEL_ENGINES = ("openpyxl", "xlsxwriter")
+
+# Los mismos estilos de _excel_styles() como propiedades de ``add_format`` de xlsxwriter
+_XLSXWRITER_BORDER = {"border": 1, "border_color": "#000000"}
+_XLSXWRITER_WRAP = {"text_wrap": True, "valign": "top"}
+_XLSXWRITER_STYLES: Dict[str, Dict[str, Any]] = {
+    "title": {"bold": True, "font_size": 14, "align": "center", "valign": "vcenter"},
+    "subtitle": {"bold": False, "font_size": 12, "align": "center", "valign": "vcenter"},
+    "week": {"bold": True, "font_size": 12, "align": "center", "valign": "vcenter"},
+    "day": {"bold": True, "align": "center", "valign": "vcenter", **_XLSXWRITER_BORDER},
+    "normal": {**_XLSXWRITER_WRAP, **_XLSXWRITER_BORDER},
+    "holiday": {**_XLSXWRITER_WRAP, **_XLSXWRITER_BORDER, "pattern": 1, "bg_color": "#C6EFCE"},
+    "exam": {**_XLSXWRITER_WRAP, **_XLSXWRITER_BORDER, "pattern": 1, "bg_color": "#F8CBAD"},
+}
+
+
+def _xlsxwriter_formats(wb: Any) -> Dict[str, Any]:
+    """Registra cada estilo una sola vez en el libro; estilos con propiedades iguales comparten Format."""
+    by_props: Dict[Tuple[Tuple[str, Any], ...], Any] = {}
+    out: Dict[str, Any] = {}
+    for name, props in _XLSXWRITER_STYLES.items():
+        key = tuple(sorted(props.items()))
+        if key not in by_props:
+            by_props[key] = wb.add_format(props)
+        out[name] = by_props[key]
     return out
 
 
@@ -140,10 +1098,15 @@ def build_excel(
     out_path: str,
     title: str,
     subtitle: str,
-    week_dates: List[WeekDates],
+    week_dates: Sequence[WeekDates],
     entries: Dict[int, Tuple[str, str, str, str]],
     holidays_map: Dict[date, str],
     exam_dates: Set[date],
+    streaming: bool = False,
+    model: Optional[Sequence[CalendarWeek]] = None,
+    progress: Optional[ProgressCallback] = None,
+    engine: str = "openpyxl",
+    deterministic: bool = False,
 ) -> None:
     """Crea un archivo Excel con el calendario.
 
@@ -156,185 +1119,1945 @@ def build_excel(
 
         Notas
         - Usa estilos simples (bordes finos, rellenos y alineaciones) para facilitar cambios futuros.
+        - ``streaming=True`` escribe fila por fila con un libro write-only de openpyxl: la memoria
+            se mantiene constante sin importar el número de semanas y el resultado visual es el mismo.
+        - ``model`` permite reutilizar un build_calendar_model() ya calculado (p. ej. Excel + PDF).
+        - ``progress(hechas, total)`` se llama después de cada semana; si lanza ExportCancelled
+            la exportación se detiene antes de escribir el archivo.
+        - ``engine`` (ver EXCEL_ENGINES): "xlsxwriter" escribe con XlsxWriter en modo
+            constant_memory (siempre en streaming, suele ser el más rápido para lotes grandes);
+            mismo diseño, combinaciones, rellenos y bordes que con openpyxl.
+        - ``deterministic=True`` fija las fechas de los metadatos y del ZIP (SOURCE_DATE_EPOCH o
+            2000-01-01): las mismas entradas producen exactamente los mismos bytes.
         """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Calendario"
-
-    # Styles
-    header_font = Font(bold=True, size=14)
-    sub_font = Font(bold=False, size=12)
-    week_header_font = Font(bold=True, size=12)
-    thin = Side(border_style="thin", color="000000")
-    border = Border(top=thin, left=thin, right=thin, bottom=thin)
-    align_center = Alignment(horizontal="center", vertical="center")
-    align_wrap = Alignment(wrap_text=True, vertical="top")
-    # Colors: holidays light green, exams light orange
-    holiday_fill = PatternFill("solid", fgColor="C6EFCE")
-    exam_fill = PatternFill("solid", fgColor="F8CBAD")
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Motor de Excel desconocido: {engine} (use {', '.join(EXCEL_ENGINES)})")
+    if model is None:
+        with TRACER.span("excel.model"):
+            model = build_calendar_model(week_dates, holidays_map, exam_dates)
+    if engine == "xlsxwriter":
+        _build_excel_xlsxwriter(out_path, title, subtitle, model, entries, progress, deterministic)
+        return
+    if streaming:
+        _build_excel_streaming(out_path, title, subtitle, model, entries, progress, deterministic)
+        return
+
+    with TRACER.span("excel.setup"):
+        from openpyxl import Workbook
+        from openpyxl.utils import get_column_letter
+
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "Calendario"
+        styles = _excel_styles()
+
+    def styled(cell: Any, style: str) -> None:
+        for attr, value in styles[style].items():
+            setattr(cell, attr, value)
 
     # Title
     ws.merge_cells(start_row=1, start_column=1, end_row=1, end_column=6)
-    ws.cell(row=1, column=1, value=title).font = header_font
-    ws.cell(row=1, column=1).alignment = align_center
+    styled(ws.cell(row=1, column=1, value=title), "title")
 
     ws.merge_cells(start_row=2, start_column=1, end_row=2, end_column=6)
-    ws.cell(row=2, column=1, value=subtitle).font = sub_font
-    ws.cell(row=2, column=1).alignment = align_center
+    styled(ws.cell(row=2, column=1, value=subtitle), "subtitle")
 
     row = 4
     # Column widths
-    widths = [22, 22, 22, 22, 1, 1]
-    for i, w in enumerate(widths, start=1):
+    for i, w in enumerate(_EXCEL_WIDTHS, start=1):
         ws.column_dimensions[get_column_letter(i)].width = w
 
-    for wd in week_dates:
-        month_name = SPANISH_MONTHS[wd.lunes.month]
-        # Week header
-        ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=4)
-        ws.cell(row=row, column=1, value=f"SEMANA {wd.semana} {month_name}").font = week_header_font
-        ws.cell(row=row, column=1).alignment = align_center
-        row += 1
-
-        # Day headers
-        headers = [
-            f"Lunes {CLASS_TIMES['lunes']} {wd.lunes.strftime('%d/%m')}",
-            f"Martes {CLASS_TIMES['martes']} {wd.martes.strftime('%d/%m')}",
-            f"Miércoles 1 {CLASS_TIMES['miercoles_1']} {wd.miercoles.strftime('%d/%m')}",
-            f"Miércoles 2 {CLASS_TIMES['miercoles_2']} {wd.miercoles.strftime('%d/%m')}",
-        ]
-        for col, h in enumerate(headers, start=1):
-            c = ws.cell(row=row, column=col, value=h)
-            c.font = Font(bold=True)
-            c.alignment = align_center
-            c.border = border
-        row += 1
-
-        # Content row
-        mon_txt, tue_txt, wed1_txt, wed2_txt = entries.get(wd.semana, ("", "", "", ""))
-
-        for col, (d, txt) in enumerate(
-            [
-                (wd.lunes, mon_txt),
-                (wd.martes, tue_txt),
-                (wd.miercoles, wed1_txt),
-                (wd.miercoles, wed2_txt),
-            ],
-            start=1,
-        ):
-            cell = ws.cell(row=row, column=col)
-            is_holiday = d in holidays_map
-            if is_holiday:
-                cell.value = f"Festivo: {holidays_map[d]}\nNo hay clase"
-                cell.fill = holiday_fill
-            elif col == 4 and d in exam_dates:
-                # Only mark exams for Wednesday Session 2 (2:00 pm - 5:00 pm)
-                cell.value = f"Examen" + (f"\n{txt}" if txt else "")
-                cell.fill = exam_fill
+    with TRACER.span("excel.cells", weeks=len(model)):
+        for n, week in enumerate(model, start=1):
+            # Week header
+            ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=4)
+            styled(ws.cell(row=row, column=1, value=week.title), "week")
+            row += 1
+
+            # Day headers
+            for col, c in enumerate(week.cells, start=1):
+                styled(ws.cell(row=row, column=col, value=c.header), "day")
+            row += 1
+
+            # Content row
+            texts = entries.get(week.semana, ("", "", "", ""))
+            for col, (c, txt) in enumerate(zip(week.cells, texts), start=1):
+                styled(ws.cell(row=row, column=col, value=c.text(txt)), c.kind)
+            row += 2  # leave a blank row between weeks
+            if progress is not None:
+                progress(n, len(model))
+
+    with TRACER.span("excel.save"):
+        _save_openpyxl(wb, out_path, deterministic)
+
+
+def _build_excel_streaming(
+    out_path: str,
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    progress: Optional[ProgressCallback] = None,
+    deterministic: bool = False,
+) -> None:
+    """Variante write-only de build_excel(): mismas filas, estilos y combinaciones.
+
+    Los estilos se registran una vez en el libro y cada celda recibe una copia de su
+    StyleArray (índices ya resueltos), evitando volver a buscar fuentes/bordes por celda.
+    """
+    with TRACER.span("excel.setup", streaming=True):
+        from openpyxl import Workbook
+
+        wb = Workbook(write_only=True)
+        ws = wb.create_sheet("Calendario")
+        cell = _write_only_cells(ws, _excel_styles())
+
+    with TRACER.span("excel.cells", weeks=len(model), streaming=True):
+        _write_only_calendar(ws, cell, title, subtitle, model, entries, progress)
+
+    with TRACER.span("excel.save", streaming=True):
+        _save_openpyxl(wb, out_path, deterministic)
+
+
+def _write_only_cells(ws: Any, styles: Dict[str, Dict[str, Any]]) -> Callable[[Any, str], Any]:
+    """Registra ``styles`` en el libro de ``ws`` y retorna una fábrica cell(valor, estilo).
+
+    Los StyleArray quedan en el libro, así que la misma fábrica sirve para todas sus hojas.
+    """
+    from copy import copy
+    from openpyxl.cell import WriteOnlyCell
+
+    registered: Dict[str, Any] = {}
+    for name, attrs in styles.items():
+        probe = WriteOnlyCell(ws)
+        for attr, value in attrs.items():
+            setattr(probe, attr, value)
+        registered[name] = probe._style
+
+    def cell(value: Any, style: str) -> Any:
+        c = WriteOnlyCell(ws, value=value)
+        c._style = copy(registered[style])
+        return c
+
+    return cell
+
+
+def _write_only_calendar(
+    ws: Any,
+    cell: Callable[[Any, str], Any],
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    progress: Optional[ProgressCallback] = None,
+) -> None:
+    """Escribe el calendario completo en una hoja write-only de openpyxl (anchos incluidos)."""
+    from openpyxl.utils import get_column_letter
+
+    for i, w in enumerate(_EXCEL_WIDTHS, start=1):
+        ws.column_dimensions[get_column_letter(i)].width = w
+
+    ws.merged_cells.add("A1:F1")
+    ws.append([cell(title, "title")])
+    ws.merged_cells.add("A2:F2")
+    ws.append([cell(subtitle, "subtitle")])
+    ws.append([])
+
+    row = 4
+    for n, week in enumerate(model, start=1):
+        ws.merged_cells.add(f"A{row}:D{row}")
+        ws.append([cell(week.title, "week")])
+        ws.append([cell(c.header, "day") for c in week.cells])
+        texts = entries.get(week.semana, ("", "", "", ""))
+        ws.append([cell(c.text(txt), c.kind) for c, txt in zip(week.cells, texts)])
+        ws.append([])  # leave a blank row between weeks
+        row += 4
+        if progress is not None:
+            progress(n, len(model))
+
+
+def _build_excel_xlsxwriter(
+    out_path: str,
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    progress: Optional[ProgressCallback] = None,
+    deterministic: bool = False,
+) -> None:
+    """Variante de build_excel() con XlsxWriter en modo ``constant_memory``.
+
+    Cada fila se vuelca a disco en cuanto se pasa a la siguiente, así que las filas se
+    escriben en orden estricto. Los Format se crean una vez por libro (_xlsxwriter_formats)
+    en lugar de uno por celda. El libro se arma en un temporal y se renombra al final, para
+    no dejar un archivo a medias si se cancela.
+    """
+    try:
+        import xlsxwriter  # type: ignore
+    except ImportError:
+        raise RuntimeError("XlsxWriter no está instalado. Instálalo para usar el motor xlsxwriter.")
+
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    wb = None
+    try:
+        with TRACER.span("excel.setup", engine="xlsxwriter"):
+            wb = xlsxwriter.Workbook(tmp, {"constant_memory": True})
+            if deterministic:
+                # XlsxWriter ya fija las fechas del ZIP; sólo falta la de los metadatos
+                wb.set_properties({"created": _deterministic_datetime()})
+            ws = wb.add_worksheet("Calendario")
+            fmt = _xlsxwriter_formats(wb)
+
+        with TRACER.span("excel.cells", weeks=len(model), engine="xlsxwriter"):
+            _xlsxwriter_calendar(ws, fmt, title, subtitle, model, entries, progress)
+
+        with TRACER.span("excel.save", engine="xlsxwriter"):
+            wb.close()
+        os.replace(tmp, out_path)
+    finally:
+        if wb is not None and not wb.fileclosed:
+            # Cancelado o con error: cerrar libera los temporales de constant_memory
+            try:
+                wb.close()
+            except Exception:
+                pass
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def _xlsxwriter_calendar(
+    ws: Any,
+    fmt: Dict[str, Any],
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    progress: Optional[ProgressCallback] = None,
+) -> None:
+    """Escribe el calendario completo en una hoja de XlsxWriter, en orden estricto de filas."""
+    for i, w in enumerate(_EXCEL_WIDTHS):
+        # Píxeles equivalentes al ancho que guarda openpyxl (7 px por carácter)
+        ws.set_column_pixels(i, i, round(w * 7))
+
+    ws.merge_range(0, 0, 0, 5, title, fmt["title"])
+    ws.merge_range(1, 0, 1, 5, subtitle, fmt["subtitle"])
+
+    row = 3
+    for n, week in enumerate(model, start=1):
+        ws.merge_range(row, 0, row, 3, week.title, fmt["week"])
+        for col, c in enumerate(week.cells):
+            ws.write_string(row + 1, col, c.header, fmt["day"])
+        texts = entries.get(week.semana, ("", "", "", ""))
+        for col, (c, txt) in enumerate(zip(week.cells, texts)):
+            value = c.text(txt)
+            if value:
+                ws.write_string(row + 2, col, value, fmt[c.kind])
+            else:
+                ws.write_blank(row + 2, col, None, fmt[c.kind])
+        row += 4  # leave a blank row between weeks
+        if progress is not None:
+            progress(n, len(model))
+
+
+# ---------- Importación de Excel (ida y vuelta) ----------
+# Filas que escribe build_excel(): "SEMANA 3 Septiembre", "Lunes 2:00 pm - 4:00 pm 01/09"
+# Sensible a mayúsculas: el encabezado es "SEMANA X Mes" y un tema puede empezar con "Semana 5 …"
+_XLSX_WEEK_RE = re.compile(r"^\s*SEMANA\s+(\d+)\b")
+_XLSX_DAY_RE = re.compile(r"(\d{1,2})/(\d{1,2})\s*$")
+_XLSX_YEAR_RE = re.compile(r"\b((?:19|20)\d{2})\b")
+
+
+def _xlsx_text(value: Any) -> str:
+    return "" if value is None else str(value).replace("\r\n", "\n").strip()
+
+
+def _xlsx_start(week_days: Dict[int, Tuple[int, int]], hints: Sequence[str]) -> date:
+    """Lunes de la semana 1 a partir del "dd/mm" de los encabezados (que no traen el año).
+
+    El año sale del primer año escrito en el subtítulo o el título (o del año actual) y
+    se ajusta a ±1 para que la fecha caiga en lunes.
+    """
+    semana = min(week_days)
+    day, month = week_days[semana]
+    year = date.today().year
+    for text in hints:
+        m = _XLSX_YEAR_RE.search(text)
+        if m:
+            year = int(m.group(1))
+            break
+    monday = None
+    for y in (year, year - 1, year + 1):
+        try:
+            d = date(y, month, day)
+        except ValueError:
+            continue
+        if d.weekday() == 0:
+            monday = d
+            break
+    if monday is None:
+        raise ValueError(f"El encabezado de la semana {semana} no corresponde a un lunes ({day:02d}/{month:02d})")
+    return monday - timedelta(weeks=semana - 1)
+
+
+def _xlsx_sheet(rows: Any, name: str) -> Optional[Dict[str, Any]]:
+    """Reconstruye un curso a partir de las filas (valores) de una hoja del calendario."""
+    title = subtitle = ""
+    entries: Dict[str, List[str]] = {}
+    exams: List[Tuple[int, Tuple[int, int]]] = []  # (semana, (día, mes))
+    week_days: Dict[int, Tuple[int, int]] = {}
+    semana: Optional[int] = None
+    days: List[Optional[Tuple[int, int]]] = []
+    state = "title"
+    for values in rows:
+        first = _xlsx_text(values[0]) if values else ""
+        # La fila siguiente a los días es siempre la de textos, aunque empiece con "SEMANA"
+        m = _XLSX_WEEK_RE.match(first) if state != "content" else None
+        if m:
+            semana, state = int(m.group(1)), "days"
+            continue
+        if state == "title":
+            if first and not title:
+                title = first
+            elif first and not subtitle:
+                subtitle = first
+        elif state == "days":
+            days = []
+            for v in values[: len(SESSIONS)]:
+                dm = _XLSX_DAY_RE.search(_xlsx_text(v))
+                days.append((int(dm.group(1)), int(dm.group(2))) if dm else None)
+            if days and days[0] is not None:
+                week_days[semana] = days[0]  # type: ignore[index]
+            state = "content"
+        elif state == "content":
+            texts = [_xlsx_text(v) for v in values[: len(SESSIONS)]]
+            texts += [""] * (len(SESSIONS) - len(texts))
+            for i, (_, _, _, allow_exam) in enumerate(SESSIONS):
+                txt = texts[i]
+                if txt.startswith("Festivo:"):
+                    # La celda del festivo se regenera desde el calendario de festivos
+                    texts[i] = ""
+                elif allow_exam and (txt == "Examen" or txt.startswith("Examen\n")):
+                    texts[i] = txt[len("Examen"):].strip()
+                    if i < len(days) and days[i] is not None:
+                        exams.append((semana, days[i]))  # type: ignore[arg-type]
+            entries[str(semana)] = texts
+            state = "gap"
+    if not week_days:
+        return None
+    start = _xlsx_start(week_days, (subtitle, title))
+    # Fechas de examen: semana + "dd/mm" -> fecha completa usando el inicio ya resuelto
+    exam_dates = []
+    for sem, day_month in exams:
+        monday = start + timedelta(weeks=sem - 1)
+        for offset in range(7):
+            d = monday + timedelta(days=offset)
+            if (d.day, d.month) == day_month:
+                exam_dates.append(d.isoformat())
+                break
+    return {
+        "name": name,
+        "title": title,
+        "subtitle": subtitle,
+        "start_date": start.isoformat(),
+        "weeks": max(max(map(int, entries), default=0), max(week_days)),
+        "exam_dates": sorted(exam_dates),
+        "entries": entries,
+    }
+
+
+def _xlsx_index(rows: Any) -> Dict[str, str]:
+    """Hoja -> nombre completo del curso, leído de las columnas "Hoja" y "Curso" del Índice."""
+    names: Dict[str, str] = {}
+    cols: Optional[Tuple[int, int]] = None
+    for values in rows:
+        texts = [_xlsx_text(v) for v in values]
+        if cols is None:
+            if "Hoja" in texts and "Curso" in texts:
+                cols = (texts.index("Hoja"), texts.index("Curso"))
+            continue
+        sheet, course = (texts[i] if i < len(texts) else "" for i in cols)
+        if sheet and course:
+            names[sheet] = course
+    return names
+
+
+def read_excel(path: str) -> Iterator[Dict[str, Any]]:
+    """Lee de vuelta un Excel generado por build_excel() o build_workbook() (y editado a mano).
+
+    Genera un registro por hoja de calendario, en el formato del respaldo JSON (``title``,
+    ``subtitle``, ``start_date``, ``weeks``, ``exam_dates``, ``entries``) más ``name``: el
+    nombre del archivo para un Excel individual o, dentro de un libro, el nombre completo del
+    curso que el Índice asocia a la hoja (los nombres de hoja se recortan a 31 caracteres).
+    Reconoce las filas "SEMANA X MES", la fila de encabezados de día ("dd/mm") y la fila de
+    textos; las celdas "Festivo: …" se descartan y el rótulo "Examen" se quita del texto y su
+    día se agrega a ``exam_dates``. El libro se abre en modo read-only de openpyxl: las filas se
+    leen en streaming y la memoria no depende del tamaño del archivo.
+    """
+    from openpyxl import load_workbook
+
+    stem = _safe_filename(os.path.splitext(os.path.basename(path))[0])
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        names: Dict[str, str] = {}
+        for ws in wb.worksheets:
+            if ws.title == WORKBOOK_INDEX_SHEET:
+                # build_workbook() escribe el Índice como primera hoja
+                names = _xlsx_index(ws.iter_rows(max_col=len(_INDEX_HEADERS), values_only=True))
+                continue
+            if ws.title == "Calendario":
+                name = stem
             else:
-                cell.value = txt
-            cell.alignment = align_wrap
-            cell.border = border
-        row += 2  # leave a blank row between weeks
+                name = _safe_filename(names.get(ws.title) or ws.title)
+            with TRACER.span("excel.import") as span:
+                rec = _xlsx_sheet(ws.iter_rows(max_col=len(SESSIONS), values_only=True), name)
+                if TRACER.enabled:
+                    span.args["weeks"] = len(rec["entries"]) if rec else 0
+            if rec is not None:
+                yield rec
+    finally:
+        wb.close()
+
+
+# ---------- Exportación iCalendar (.ics) ----------
+# Colombia no tiene horario de verano desde 1993: America/Bogota es siempre UTC-5
+ICS_TZID = "America/Bogota"
+_ICS_TIMEZONE = (
+    "BEGIN:VTIMEZONE",
+    f"TZID:{ICS_TZID}",
+    "BEGIN:STANDARD",
+    "DTSTART:19700101T000000",
+    "TZOFFSETFROM:-0500",
+    "TZOFFSETTO:-0500",
+    "TZNAME:-05",
+    "END:STANDARD",
+    "END:VTIMEZONE",
+)
+_ICS_PRODID = "-//CalendarProject//Generador de calendario de clases//ES"
+_CLASS_TIME_RE = re.compile(r"(\d{1,2}):(\d{2})\s*([ap])\.?\s*m", re.IGNORECASE)
+_ICS_HOURS: Dict[str, Tuple[Tuple[int, int], Tuple[int, int]]] = {}
+
+
+def _class_hours(slot: str) -> Tuple[Tuple[int, int], Tuple[int, int]]:
+    """(inicio, fin) en 24 h de una franja de CLASS_TIMES ("2:00 pm - 4:00 pm")."""
+    hours = _ICS_HOURS.get(slot)
+    if hours is None:
+        found = _CLASS_TIME_RE.findall(CLASS_TIMES[slot])
+        if len(found) != 2:
+            raise ValueError(f"Horario no reconocido en CLASS_TIMES[{slot!r}]: {CLASS_TIMES[slot]}")
+        hm = [((int(h) % 12) + (12 if ap.lower() == "p" else 0), int(m)) for h, m, ap in found]
+        hours = _ICS_HOURS[slot] = (hm[0], hm[1])
+    return hours
+
+
+def _ics_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\r\n", "\n").replace("\n", "\\n")
+
+
+def _ics_line(line: str) -> str:
+    """Línea de contenido con CRLF, plegada a 75 octetos como exige RFC 5545."""
+    raw = line.encode("utf-8")
+    if len(raw) <= 75:
+        return line + "\r\n"
+    parts = []
+    limit = 75
+    while len(raw) > limit:
+        cut = limit
+        while cut and (raw[cut] & 0xC0) == 0x80:  # no partir un carácter UTF-8
+            cut -= 1
+        parts.append(raw[:cut].decode("utf-8"))
+        raw = raw[cut:]
+        limit = 74  # las líneas de continuación empiezan con un espacio
+    parts.append(raw.decode("utf-8"))
+    return "\r\n ".join(parts) + "\r\n"
+
+
+def _ics_stamp(deterministic: bool) -> str:
+    when = _deterministic_datetime() if deterministic else datetime.now(timezone.utc).replace(tzinfo=None)
+    return when.strftime("%Y%m%dT%H%M%SZ")
+
+
+def ics_events(
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    stamp: str,
+    progress: Optional[ProgressCallback] = None,
+    course_key: str = "",
+) -> Iterator[str]:
+    """Genera las líneas (ya plegadas, con CRLF) de un VEVENT por sesión de clase.
+
+    Las sesiones en festivo se omiten. Cada evento lleva la hora de CLASS_TIMES en
+    America/Bogota, el tema de ``entries`` en SUMMARY (con el título del curso) y el texto
+    completo en DESCRIPTION; las sesiones de examen llevan "Examen" en SUMMARY y la categoría
+    "Examen". El UID sólo depende del curso, la fecha y la franja: al reimportar el archivo,
+    los calendarios actualizan los eventos en lugar de duplicarlos. ``course_key`` identifica
+    al curso (su nombre en el lote o en el almacén): dos secciones con el mismo título deben
+    pasar claves distintas para que sus UID no se repitan. Con clave, el UID no depende del
+    título ni del subtítulo (corregirlos no duplica las citas); sin ella, se usan ambos.
+    """
+    import hashlib
+
+    key = course_key or f"{title}\n{subtitle}"
+    course = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+    for n, week in enumerate(model, start=1):
+        texts = entries.get(week.semana, ("", "", "", ""))
+        for (_, _, slot, _), cell, txt in zip(SESSIONS, week.cells, texts):
+            if cell.kind == CELL_HOLIDAY:
+                continue
+            (h0, m0), (h1, m1) = _class_hours(slot)
+            day = cell.day.strftime("%Y%m%d")
+            topic = (txt or "").strip()
+            summary = title
+            if topic:
+                summary = f"{title}: {topic.splitlines()[0]}"
+            if cell.kind == CELL_EXAM:
+                summary = f"Examen - {summary}"
+            description = f"Semana {week.semana}" + (f"\n{topic}" if topic else "")
+            yield _ics_line("BEGIN:VEVENT")
+            yield _ics_line(f"UID:{day}-{slot}-{course}@calendario")
+            yield _ics_line(f"DTSTAMP:{stamp}")
+            yield _ics_line(f"DTSTART;TZID={ICS_TZID}:{day}T{h0:02d}{m0:02d}00")
+            yield _ics_line(f"DTEND;TZID={ICS_TZID}:{day}T{h1:02d}{m1:02d}00")
+            yield _ics_line(f"SUMMARY:{_ics_escape(summary)}")
+            yield _ics_line(f"DESCRIPTION:{_ics_escape(description)}")
+            yield _ics_line("CATEGORIES:" + ("Examen" if cell.kind == CELL_EXAM else "Clase"))
+            yield _ics_line("END:VEVENT")
+        if progress is not None:
+            progress(n, len(model))
+
+
+def _ics_calendar(name: str, events: Iterator[str]) -> Iterator[str]:
+    """Envuelve ``events`` en un VCALENDAR con la zona America/Bogota."""
+    yield _ics_line("BEGIN:VCALENDAR")
+    yield _ics_line("VERSION:2.0")
+    yield _ics_line(f"PRODID:{_ICS_PRODID}")
+    yield _ics_line("CALSCALE:GREGORIAN")
+    yield _ics_line(f"X-WR-CALNAME:{_ics_escape(name)}")
+    yield _ics_line(f"X-WR-TIMEZONE:{ICS_TZID}")
+    for line in _ICS_TIMEZONE:
+        yield _ics_line(line)
+    yield from events
+    yield _ics_line("END:VCALENDAR")
+
+
+def _write_lines(out_path: str, lines: Iterator[str]) -> None:
+    """Escribe ``lines`` a medida que se generan (archivo temporal + rename al final)."""
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "w", encoding="utf-8", newline="") as f:
+            f.writelines(lines)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def build_ics(
+    out_path: str,
+    title: str,
+    subtitle: str,
+    week_dates: Sequence[WeekDates],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    holidays_map: Dict[date, str],
+    exam_dates: Set[date],
+    model: Optional[Sequence[CalendarWeek]] = None,
+    progress: Optional[ProgressCallback] = None,
+    deterministic: bool = False,
+    course_key: str = "",
+) -> None:
+    """Crea un archivo iCalendar (.ics) con un evento por sesión de clase (ver ics_events()).
 
-    wb.save(out_path)
+    Mismos argumentos que build_excel()/build_pdf() más ``course_key`` (clave del curso para
+    los UID). Los eventos se escriben a medida que se generan; ``deterministic=True`` fija
+    DTSTAMP (SOURCE_DATE_EPOCH o 2000-01-01).
+    """
+    if model is None:
+        model = build_calendar_model(week_dates, holidays_map, exam_dates)
+    with TRACER.span("ics.write", weeks=len(model)):
+        stamp = _ics_stamp(deterministic)
+        _write_lines(out_path, _ics_calendar(title, ics_events(
+            title, subtitle, model, entries, stamp, progress, course_key
+        )))
+
+
+def build_ics_feed(out_path: str, courses: Iterable["CourseSpec"], name: str = "Calendario de clases",
+                   deterministic: bool = False) -> int:
+    """Un solo .ics con las sesiones de todos los ``courses``; retorna los cursos escritos.
+
+    Los cursos se consumen de a uno (``courses`` puede ser un generador) y cada uno se
+    escribe antes de calcular el siguiente, así que la memoria no crece con el lote.
+    """
+    count = 0
+
+    def events() -> Iterator[str]:
+        nonlocal count
+        stamp = _ics_stamp(deterministic)
+        for course in courses:
+            week_dates = compute_weeks(course.start, course.weeks)
+            holidays_map = get_colombia_holidays(course.start, week_dates[-1].miercoles)
+            model = build_calendar_model(week_dates, holidays_map, course.exam_dates)
+            yield from ics_events(course.title, course.subtitle, model, course.entries, stamp,
+                                  course_key=course.name)
+            count += 1
+
+    with TRACER.span("ics.feed") as span:
+        _write_lines(out_path, _ics_calendar(name, events()))
+        if TRACER.enabled:
+            span.args["courses"] = count
+    return count
+
+
+# ---------- Exportación tabular de sesiones (CSV/Parquet) ----------
+# Una fila por sesión: curso, semana, fecha, franja (clave de CLASS_TIMES), hora de inicio y
+# fin ("HH:MM", America/Bogota), estado y tema
+SESSION_COLUMNS = ("course", "week", "date", "slot", "start", "end", "status", "topic")
+_SESSION_STATUS = {CELL_NORMAL: "class", CELL_HOLIDAY: "holiday", CELL_EXAM: "exam"}
+# Filas por lote al escribir: acota la memoria sin importar el número de cursos
+_SESSION_BATCH_ROWS = 65536
+
+
+def _session_grid(start: date, weeks: int, exam_dates: Set[date]) -> List[Tuple[int, Tuple[Tuple[Any, ...], ...]]]:
+    """Parte fija de las filas de un calendario: por semana, (semana, fecha ISO, franja,
+    inicio, fin, estado) de cada sesión más un indicador de festivo."""
+    week_dates = compute_weeks(start, weeks)
+    holidays_map = get_colombia_holidays(start, week_dates[-1].miercoles)
+    model = build_calendar_model(week_dates, holidays_map, exam_dates)
+    slots = []
+    for _, _, slot, _ in SESSIONS:
+        (h0, m0), (h1, m1) = _class_hours(slot)
+        slots.append((slot, f"{h0:02d}:{m0:02d}", f"{h1:02d}:{m1:02d}"))
+    return [
+        (week.semana, tuple(
+            ((week.semana, cell.day.isoformat(), slot, t0, t1, _SESSION_STATUS[cell.kind]), cell.kind == CELL_HOLIDAY)
+            for (slot, t0, t1), cell in zip(slots, week.cells)
+        ))
+        for week in model
+    ]
+
+
+def iter_sessions(courses: Iterable["CourseSpec"]) -> Iterator[Tuple[Any, ...]]:
+    """Genera una fila (ver SESSION_COLUMNS) por cada sesión de cada curso, en orden.
+
+    Usa el mismo motor que los exportadores (compute_weeks(), get_colombia_holidays() y
+    build_calendar_model()). ``date`` es la fecha ISO ("AAAA-MM-DD"), ``status`` es "class",
+    "holiday" o "exam" y el tema de una sesión en festivo queda vacío. La parte fija de las
+    filas se calcula una vez por (inicio, semanas, exámenes): en un lote, los cursos del
+    mismo semestre sólo agregan su nombre y sus temas. ``courses`` se consume de a uno, así
+    que puede ser un generador.
+    """
+    grids: "OrderedDict[Any, List[Tuple[int, Tuple[Tuple[Any, ...], ...]]]]" = OrderedDict()
+    empty = ("",) * len(SESSIONS)
+    for course in courses:
+        key = (course.start, course.weeks, frozenset(course.exam_dates))
+        grid = grids.get(key)
+        if grid is None:
+            grid = grids[key] = _session_grid(course.start, course.weeks, course.exam_dates)
+            if len(grids) > _MODEL_CACHE_SIZE:
+                grids.popitem(last=False)
+        else:
+            grids.move_to_end(key)
+        name = (course.name,)
+        entries = course.entries
+        for semana, cells in grid:
+            texts = entries.get(semana, empty)
+            for (fixed, holiday), txt in zip(cells, texts):
+                yield name + fixed + ("" if holiday else txt,)
+
+
+def write_sessions(out_path: str, courses: Iterable["CourseSpec"], fmt: Optional[str] = None) -> int:
+    """Escribe iter_sessions() en CSV o Parquet (por la extensión o ``fmt``); retorna las filas.
+
+    Las filas se escriben por lotes de _SESSION_BATCH_ROWS a medida que se generan. Parquet
+    requiere pyarrow (columnas course/slot/status con diccionario, ``date`` como date32 y
+    ``week`` como int16); si no está, se lanza un RuntimeError controlado.
+    """
+    from itertools import islice
+
+    fmt = (fmt or ("parquet" if out_path.lower().endswith((".parquet", ".pq")) else "csv")).lower()
+    if fmt not in ("csv", "parquet"):
+        raise ValueError(f"Formato de sesiones desconocido: {fmt} (use csv o parquet)")
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("pyarrow no está instalado. Instálalo para exportar a Parquet.")
+
+    rows = iter_sessions(courses)
+    total = 0
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    with TRACER.span("sessions.write", format=fmt) as span:
+        try:
+            if fmt == "csv":
+                import csv
+
+                with open(tmp, "w", encoding="utf-8", newline="") as f:
+                    writer = csv.writer(f)
+                    writer.writerow(SESSION_COLUMNS)
+                    while True:
+                        batch = list(islice(rows, _SESSION_BATCH_ROWS))
+                        if not batch:
+                            break
+                        writer.writerows(batch)
+                        total += len(batch)
+            else:
+                text = pa.dictionary(pa.int32(), pa.string())
+                schema = pa.schema([
+                    ("course", text), ("week", pa.int16()), ("date", pa.date32()), ("slot", text),
+                    ("start", pa.string()), ("end", pa.string()), ("status", text), ("topic", pa.string()),
+                ])
+                with pq.ParquetWriter(tmp, schema) as writer:
+                    while True:
+                        batch = list(islice(rows, _SESSION_BATCH_ROWS))
+                        if not batch:
+                            break
+                        columns = list(zip(*batch))
+                        # Texto -> tipo de la columna (diccionario, date32) con los cast de Arrow
+                        writer.write_batch(pa.record_batch(
+                            [pa.array(col).cast(field.type) if field.type in (text, pa.date32())
+                             else pa.array(col, field.type) for col, field in zip(columns, schema)],
+                            schema=schema,
+                        ))
+                        total += len(batch)
+            os.replace(tmp, out_path)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if TRACER.enabled:
+            span.args["rows"] = total
+    return total
+
+
+# Modos de build_pdf(): "platypus" (maquetación completa), "fast" (texto plano donde cabe)
+# y "canvas" (dibujo directo, para lotes grandes)
+PDF_MODES = ("platypus", "fast", "canvas")
+# Geometría común a los tres modos (puntos)
+_PDF_COL_WIDTH = 200
+_PDF_PADDING = 6
+_PDF_MARGINS = {"rightMargin": 18, "leftMargin": 18, "topMargin": 24, "bottomMargin": 24}
+_PDF_FILLS = {CELL_HOLIDAY: "#C6EFCE", CELL_EXAM: "#F8CBAD"}
+
+_PDF_STYLES: Optional[Any] = None
+_PDF_HEADERS: "OrderedDict[str, Any]" = OrderedDict()
+_PDF_HEADERS_SIZE = 4096
+
+
+def _pdf_styles() -> Any:
+    """Hoja de estilos de reportlab, creada una sola vez por proceso."""
+    global _PDF_STYLES
+    if _PDF_STYLES is None:
+        from reportlab.lib.styles import getSampleStyleSheet
+
+        _PDF_STYLES = getSampleStyleSheet()
+    return _PDF_STYLES
+
+
+def _pdf_paragraph(text: str, bold: bool = False) -> Any:
+    """Paragraph de una celda (texto escapado, saltos de línea como <br/>)."""
+    from reportlab.platypus import Paragraph
+    from xml.sax.saxutils import escape
+
+    safe = escape(text or "").replace("\n", "<br/>")
+    if bold:
+        safe = f"<b>{safe}</b>"
+    return Paragraph(safe, _pdf_styles()["BodyText"])
+
+
+def _pdf_header(text: str) -> Any:
+    """Paragraph en negrita de un encabezado de día, memorizado por texto.
+
+    Los encabezados (día, horario y fecha) se repiten entre cursos con el mismo inicio; el
+    mismo Paragraph puede reutilizarse porque todas las columnas tienen el mismo ancho.
+    """
+    hit = _PDF_HEADERS.get(text)
+    if hit is None:
+        hit = _PDF_HEADERS[text] = _pdf_paragraph(text, bold=True)
+        while len(_PDF_HEADERS) > _PDF_HEADERS_SIZE:
+            _PDF_HEADERS.popitem(last=False)
+    else:
+        _PDF_HEADERS.move_to_end(text)
+    return hit
+
+
+def _pdf_fits(text: str, font: str, size: float = 10) -> bool:
+    """True si cada línea de ``text`` cabe en la columna sin ajuste de línea."""
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+
+    room = _PDF_COL_WIDTH - 2 * _PDF_PADDING
+    return all(stringWidth(line, font, size) <= room for line in text.split("\n"))
 
 
 def build_pdf(
     out_path: str,
     title: str,
     subtitle: str,
-    week_dates: List[WeekDates],
+    week_dates: Sequence[WeekDates],
     entries: Dict[int, Tuple[str, str, str, str]],
     holidays_map: Dict[date, str],
     exam_dates: Set[date],
+    model: Optional[Sequence[CalendarWeek]] = None,
+    progress: Optional[ProgressCallback] = None,
+    mode: str = "platypus",
+    deterministic: bool = False,
 ) -> None:
     """Crea un PDF con el calendario por tablas (opcional).
 
     - Cada semana se imprime como una tabla de 2 filas: encabezados (días) y contenidos.
     - Sombrea las celdas de días festivos para diferenciarlas.
     - Requiere la librería reportlab. Si no está, se lanza un RuntimeError controlado.
+    - ``model`` permite reutilizar un build_calendar_model() ya calculado.
+    - ``progress(hechas, total)`` se llama por semana al armar las tablas y de nuevo al
+      maquetarlas (total = 2 × semanas); si lanza ExportCancelled no se escribe el archivo.
+    - ``mode`` (ver PDF_MODES): "platypus" usa un Paragraph por celda; "fast" usa texto plano
+      en las celdas que caben sin ajuste de línea (mismo diseño, tipografía de tabla) y
+      "canvas" dibuja directamente en el lienzo sin maquetación de platypus.
+    - ``deterministic=True`` activa el modo ``invariant`` de ReportLab: fecha fija
+      (SOURCE_DATE_EPOCH o 2000-01-01) e identificador del documento derivado del contenido.
     """
-    if not REPORTLAB_OK:
+    if mode not in PDF_MODES:
+        raise ValueError(f"Modo de PDF desconocido: {mode} (use {', '.join(PDF_MODES)})")
+    if not reportlab_available():
         raise RuntimeError("ReportLab no está instalado. Instálalo para exportar a PDF.")
+    if model is None:
+        with TRACER.span("pdf.model"):
+            model = build_calendar_model(week_dates, holidays_map, exam_dates)
+    if mode == "canvas":
+        _build_pdf_canvas(out_path, title, subtitle, model, entries, progress, deterministic)
+        return
+
+    with TRACER.span("pdf.setup"):
+        from reportlab.lib import colors
+        from reportlab.lib.pagesizes import A4, landscape
+        from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
+
+        # invariant=None deja la configuración global de ReportLab (rl_config.invariant)
+        invariant = 1 if deterministic else None
+        doc = SimpleDocTemplate(out_path, pagesize=landscape(A4), invariant=invariant, **_PDF_MARGINS)
+        styles = _pdf_styles()
+    fast = mode == "fast"
+    base_cmds: List[Tuple[Any, ...]] = [
+        ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
+        ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
+        ("ALIGN", (0, 0), (-1, 0), "CENTER"),  # headers centered
+        ("ALIGN", (0, 1), (-1, -1), "LEFT"),    # body left-aligned
+        ("VALIGN", (0, 0), (-1, -1), "TOP"),
+        ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
+        ("LEFTPADDING", (0, 0), (-1, -1), _PDF_PADDING),
+        ("RIGHTPADDING", (0, 0), (-1, -1), _PDF_PADDING),
+    ]
+    if fast:
+        # Las celdas de texto plano imitan a los Paragraph (BodyText: Helvetica 10/12, a la izquierda)
+        base_cmds += [
+            ("ALIGN", (0, 0), (-1, 0), "LEFT"),
+            ("FONT", (0, 0), (-1, 0), "Helvetica-Bold", 10, 12),
+            ("FONT", (0, 1), (-1, -1), "Helvetica", 10, 12),
+        ]
+    # Un TableStyle por patrón de semana (tipos de celda): normalmente hay muy pocos
+    week_styles: Dict[Tuple[str, ...], Any] = {}
+
+    def week_style(week: CalendarWeek) -> Any:
+        kinds = tuple(c.kind for c in week.cells)
+        hit = week_styles.get(kinds)
+        if hit is None:
+            # Shade holiday/exam cells: light green for holidays, light orange for exams
+            shades = [("BACKGROUND", (c, 1), (c, 1), colors.HexColor(_PDF_FILLS[k]))
+                      for c, k in enumerate(kinds) if k in _PDF_FILLS]
+            hit = week_styles[kinds] = TableStyle(base_cmds + shades)
+        return hit
+
+    def header(text: str) -> Any:
+        return text if fast and _pdf_fits(text, "Helvetica-Bold") else _pdf_header(text)
+
+    def body(text: str) -> Any:
+        return text if fast and _pdf_fits(text, "Helvetica") else _pdf_paragraph(text)
 
-    doc = SimpleDocTemplate(out_path, pagesize=landscape(A4), rightMargin=18, leftMargin=18, topMargin=24, bottomMargin=24)
-    styles = getSampleStyleSheet()
-    # Paragraph helpers for wrapping text within table cells
-    try:
-        from xml.sax.saxutils import escape as _xml_escape
-    except Exception:
-        _xml_escape = lambda s: s  # fallback, unlikely to be used
-
-    def P(text: str, bold: bool = False):
-        safe = _xml_escape(text or "").replace("\n", "<br/>")
-        if bold:
-            safe = f"<b>{safe}</b>"
-        return Paragraph(safe, styles["BodyText"])
     parts: List = []
     parts.append(Paragraph(title, styles["Title"]))
     parts.append(Paragraph(subtitle, styles["Normal"]))
     parts.append(Spacer(1, 10))
 
-    for wd in week_dates:
-        month_name = SPANISH_MONTHS[wd.lunes.month]
-        parts.append(Paragraph(f"SEMANA {wd.semana} {month_name}", styles["Heading2"]))
-
-        data = [[
-            P(f"Lunes {CLASS_TIMES['lunes']} {wd.lunes.strftime('%d/%m')}", bold=True),
-            P(f"Martes {CLASS_TIMES['martes']} {wd.martes.strftime('%d/%m')}", bold=True),
-            P(f"Miércoles 1 {CLASS_TIMES['miercoles_1']} {wd.miercoles.strftime('%d/%m')}", bold=True),
-            P(f"Miércoles 2 {CLASS_TIMES['miercoles_2']} {wd.miercoles.strftime('%d/%m')}", bold=True),
-        ]]
-
-        mon_txt, tue_txt, wed1_txt, wed2_txt = entries.get(wd.semana, ("", "", "", ""))
-
-        def cell_text(d: date, txt: str, allow_exam: bool = False) -> str:
-            if d in holidays_map:
-                return f"Festivo: {holidays_map[d]}\nNo hay clase"
-            if allow_exam and d in exam_dates:
-                return "Examen" + (f"\n{txt}" if txt else "")
-            return txt or ""
-
-        data.append([
-            P(cell_text(wd.lunes, mon_txt, allow_exam=False)),
-            P(cell_text(wd.martes, tue_txt, allow_exam=False)),
-            P(cell_text(wd.miercoles, wed1_txt, allow_exam=False)),
-            P(cell_text(wd.miercoles, wed2_txt, allow_exam=True)),
-        ])
-        t = Table(data, colWidths=[200, 200, 200, 200])
-        t.setStyle(
-            TableStyle([
-                ("BACKGROUND", (0, 0), (-1, 0), colors.lightgrey),
-                ("TEXTCOLOR", (0, 0), (-1, 0), colors.black),
-                ("ALIGN", (0, 0), (-1, 0), "CENTER"),  # headers centered
-                ("ALIGN", (0, 1), (-1, -1), "LEFT"),    # body left-aligned
-                ("VALIGN", (0, 0), (-1, -1), "TOP"),
-                ("GRID", (0, 0), (-1, -1), 0.5, colors.black),
-                ("LEFTPADDING", (0, 0), (-1, -1), 6),
-                ("RIGHTPADDING", (0, 0), (-1, -1), 6),
-            ])
-        )
-        # Shade holiday/exam cells
-        holidays_cols = []
-        if wd.lunes in holidays_map:
-            holidays_cols.append(0)
-        if wd.martes in holidays_map:
-            holidays_cols.append(1)
-        if wd.miercoles in holidays_map:
-            holidays_cols.extend([2, 3])
-        for c in holidays_cols:
-            # Light green for holidays
-            t.setStyle(TableStyle([("BACKGROUND", (c, 1), (c, 1), colors.HexColor('#C6EFCE'))]))
+    total = 2 * len(model)
+    with TRACER.span("pdf.flowables", weeks=len(model), mode=mode):
+        for n, week in enumerate(model, start=1):
+            parts.append(Paragraph(week.title, styles["Heading2"]))
+
+            texts = entries.get(week.semana, ("", "", "", ""))
+            data = [
+                [header(c.header) for c in week.cells],
+                [body(c.text(txt)) for c, txt in zip(week.cells, texts)],
+            ]
+            t = Table(data, colWidths=[_PDF_COL_WIDTH] * len(week.cells))
+            t.setStyle(week_style(week))
 
-        # Only highlight exam for Wednesday Session 2 (column index 3)
-        if wd.miercoles in exam_dates:
-            t.setStyle(TableStyle([("BACKGROUND", (3, 1), (3, 1), colors.HexColor('#F8CBAD'))]))
+            t._calendario_week = True  # marca para contar el avance al maquetar
+            parts.append(t)
+            parts.append(Spacer(1, 6))
+            if progress is not None:
+                progress(n, total)
 
-        parts.append(t)
-        parts.append(Spacer(1, 6))
+    if progress is not None:
+        laid_out = [len(model)]
 
-    doc.build(parts)
+        def after_flowable(flowable: Any) -> None:
+            if getattr(flowable, "_calendario_week", False):
+                laid_out[0] += 1
+                progress(min(laid_out[0], total), total)
+
+        doc.afterFlowable = after_flowable  # type: ignore[method-assign]
+    # doc.build maqueta y escribe el archivo en un solo paso
+    with TRACER.span("pdf.build", flowables=len(parts)):
+        doc.build(parts)
+
+
+def _build_pdf_canvas(
+    out_path: str,
+    title: str,
+    subtitle: str,
+    model: Sequence[CalendarWeek],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    progress: Optional[ProgressCallback] = None,
+    deterministic: bool = False,
+) -> None:
+    """Variante de build_pdf() que dibuja directamente con ``reportlab.pdfgen.canvas``.
+
+    Reproduce la misma página (márgenes, títulos, tablas de 4 columnas, sombreado y
+    grilla) sin crear flowables: el ajuste de línea usa ``simpleSplit`` y los saltos de
+    página se calculan a mano. Una fila más alta que la página se corta al final de ésta.
+    El archivo se escribe en un temporal y se renombra, para no dejar un PDF a medias al
+    cancelar.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape
+    from reportlab.lib.utils import simpleSplit
+    from reportlab.pdfgen import canvas
+
+    page_w, page_h = landscape(A4)
+    # El Frame de SimpleDocTemplate agrega 6 pt de relleno por lado dentro de los márgenes
+    left, top = _PDF_MARGINS["leftMargin"] + 6, page_h - _PDF_MARGINS["topMargin"] - 6
+    bottom = _PDF_MARGINS["bottomMargin"] + 6
+    frame_w = page_w - _PDF_MARGINS["leftMargin"] - _PDF_MARGINS["rightMargin"] - 12
+    ncols = len(SESSIONS)
+    x0 = left + (frame_w - ncols * _PDF_COL_WIDTH) / 2  # tabla centrada como en platypus
+    room = _PDF_COL_WIDTH - 2 * _PDF_PADDING
+    leading, vpad = 12, 3
+    fills = {k: colors.HexColor(v) for k, v in _PDF_FILLS.items()}
+
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    c = canvas.Canvas(tmp, pagesize=(page_w, page_h), invariant=1 if deterministic else None)
+    y = top
+
+    def lines(text: str, font: str) -> List[str]:
+        out: List[str] = []
+        for para in (text or "").split("\n"):
+            out += simpleSplit(para, font, 10, room) or [""]
+        return out
+
+    try:
+        with TRACER.span("pdf.canvas", weeks=len(model)):
+            c.setFont("Helvetica-Bold", 18)
+            y -= 18
+            c.drawCentredString(left + frame_w / 2, y, title)
+            y -= 4 + 6
+            c.setFont("Helvetica", 10)
+            y -= 10
+            c.drawString(left, y, subtitle)
+            y -= 2 + 10
+
+            for n, week in enumerate(model, start=1):
+                texts = entries.get(week.semana, ("", "", "", ""))
+                head = [lines(cell.header, "Helvetica-Bold") for cell in week.cells]
+                rows = [lines(cell.text(txt), "Helvetica") for cell, txt in zip(week.cells, texts)]
+                head_h = max(len(x) for x in head) * leading + 2 * vpad
+                body_h = max(len(x) for x in rows) * leading + 2 * vpad
+                block = 12 + 18 + 6 + head_h + body_h
+                if y - block < bottom and y < top:
+                    c.showPage()
+                    y = top
+                # Heading2: 12 antes, 18 de interlineado, 6 después
+                y -= 12 if y < top else 0
+                c.setFont("Helvetica-Bold", 14)
+                c.drawString(left, y - 14, week.title)
+                y -= 18 + 6
+
+                for r, (cells, height, font) in enumerate(((head, head_h, "Helvetica-Bold"), (rows, body_h, "Helvetica"))):
+                    # Encabezados y contenidos alineados a la izquierda, como los Paragraph de platypus
+                    for col, cell_lines in enumerate(cells):
+                        x = x0 + col * _PDF_COL_WIDTH
+                        fill = colors.lightgrey if r == 0 else fills.get(week.cells[col].kind)
+                        if fill is not None:
+                            c.setFillColor(fill)
+                            c.rect(x, y - height, _PDF_COL_WIDTH, height, stroke=0, fill=1)
+                        c.setFillColor(colors.black)
+                        c.setFont(font, 10)
+                        ty = y - vpad - 10
+                        for line in cell_lines:
+                            c.drawString(x + _PDF_PADDING, ty, line)
+                            ty -= leading
+                    c.setLineWidth(0.5)
+                    c.setStrokeColor(colors.black)
+                    c.grid([x0 + i * _PDF_COL_WIDTH for i in range(ncols + 1)], [y, y - height])
+                    y -= height
+                y -= 6  # Spacer(1, 6)
+                if progress is not None:
+                    progress(n, len(model))
+            c.save()
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# ---------- Almacén SQLite de cursos ----------
+# Columnas de textos de la tabla ``entries``: una por sesión de SESSIONS
+_STORE_COLUMNS = tuple(key for _, _, key, _ in SESSIONS)
+
+_STORE_SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS courses (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    semester TEXT NOT NULL,
+    title TEXT NOT NULL,
+    subtitle TEXT NOT NULL DEFAULT '',
+    start_date TEXT NOT NULL,
+    weeks INTEGER NOT NULL,
+    exam_dates TEXT NOT NULL DEFAULT '[]',
+    updated REAL NOT NULL,
+    UNIQUE (name, semester)
+);
+CREATE INDEX IF NOT EXISTS courses_semester ON courses (semester, start_date);
+CREATE INDEX IF NOT EXISTS courses_start ON courses (start_date);
+CREATE INDEX IF NOT EXISTS courses_updated ON courses (updated);
+CREATE TABLE IF NOT EXISTS entries (
+    course_id INTEGER NOT NULL REFERENCES courses (id) ON DELETE CASCADE,
+    semana INTEGER NOT NULL,
+    {", ".join(f"{c} TEXT NOT NULL DEFAULT ''" for c in _STORE_COLUMNS)},
+    PRIMARY KEY (course_id, semana)
+) WITHOUT ROWID;
+"""
+
+
+# Extensiones que load_manifest() abre como CalendarStore
+STORE_EXTENSIONS = (".db", ".sqlite", ".sqlite3")
+
+
+def _app_dir() -> str:
+    """Carpeta de los datos del usuario: junto al programa, o junto al .exe si está empaquetado.
+
+    Con PyInstaller ``--onefile`` el ``__file__`` apunta a la carpeta temporal de extracción,
+    que se borra al cerrar; el almacén debe vivir junto a ``sys.executable``.
+    """
+    if getattr(sys, "frozen", False):
+        return os.path.dirname(os.path.abspath(sys.executable))
+    return os.path.dirname(os.path.abspath(__file__))
+
+
+def default_store_path() -> str:
+    """Ruta por defecto del almacén de cursos (calendario.db en _app_dir())."""
+    return os.path.join(_app_dir(), "calendario.db")
+
+
+def semester_of(start: date) -> str:
+    """Semestre académico de una fecha de inicio: "2025-1" (ene-jun) o "2025-2" (jul-dic)."""
+    return f"{start.year}-{1 if start.month <= 6 else 2}"
+
+
+class CalendarStore:
+    """Cursos de muchos semestres en una base SQLite local.
+
+    Cada curso es una fila de ``courses`` (única por nombre + semestre, con índices por
+    semestre, fecha de inicio y última modificación) y cada semana con texto es una fila
+    de ``entries``. Guardar una edición actualiza sólo las semanas que cambiaron y abrir
+    un curso es una búsqueda por índice, sin leer los demás. Los registros usan el mismo
+    formato que el respaldo JSON (``title``, ``start_date``, ``entries``, ...) más ``name``
+    y ``semester``, así que import_json()/export_json() intercambian con ese formato. La
+    conexión se comparte entre hilos (hilo de Tk y escritor del respaldo) con un lock.
+    """
+
+    def __init__(self, path: str) -> None:
+        import sqlite3
+
+        self.path = path
+        self._lock = threading.Lock()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute("PRAGMA foreign_keys = ON")
+        self._db.execute("PRAGMA journal_mode = WAL")  # cada guardado agrega al log, no reescribe
+        self._db.execute("PRAGMA synchronous = NORMAL")
+        with self._db:
+            self._db.executescript(_STORE_SCHEMA)
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+    def find(self, name: str, semester: Optional[str] = None) -> Optional[int]:
+        """Id del curso ``name`` (del semestre más reciente si no se indica ``semester``)."""
+        with self._lock:
+            if semester is None:
+                row = self._db.execute(
+                    "SELECT id FROM courses WHERE name = ? ORDER BY semester DESC LIMIT 1", (name,)
+                ).fetchone()
+            else:
+                row = self._db.execute(
+                    "SELECT id FROM courses WHERE name = ? AND semester = ?", (name, semester)
+                ).fetchone()
+        return row[0] if row else None
+
+    def latest(self) -> Optional[int]:
+        """Id del último curso modificado (el que abre la GUI por defecto)."""
+        with self._lock:
+            row = self._db.execute("SELECT id FROM courses ORDER BY updated DESC LIMIT 1").fetchone()
+        return row[0] if row else None
+
+    def courses(self, semester: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Resumen (sin textos) de los cursos, por fecha de inicio."""
+        sql = "SELECT id, name, semester, title, subtitle, start_date, weeks FROM courses"
+        args: Tuple[Any, ...] = ()
+        if semester is not None:
+            sql += " WHERE semester = ?"
+            args = (semester,)
+        with self._lock:
+            rows = self._db.execute(sql + " ORDER BY start_date, name", args).fetchall()
+        keys = ("id", "name", "semester", "title", "subtitle", "start_date", "weeks")
+        return [dict(zip(keys, r)) for r in rows]
+
+    def load(self, course_id: int) -> Optional[Dict[str, Any]]:
+        """Registro completo de un curso en el formato del respaldo JSON."""
+        with self._lock:
+            row = self._db.execute(
+                "SELECT name, semester, title, subtitle, start_date, weeks, exam_dates FROM courses WHERE id = ?",
+                (course_id,),
+            ).fetchone()
+            if row is None:
+                return None
+            weeks = self._db.execute(
+                f"SELECT semana, {', '.join(_STORE_COLUMNS)} FROM entries WHERE course_id = ? ORDER BY semana",
+                (course_id,),
+            ).fetchall()
+        name, semester, title, subtitle, start, n, exams = row
+        return {
+            "name": name,
+            "semester": semester,
+            "title": title,
+            "subtitle": subtitle,
+            "start_date": start,
+            "weeks": n,
+            "exam_dates": json.loads(exams),
+            "entries": {str(w[0]): list(w[1:]) for w in weeks},
+        }
+
+    def records(self, semester: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Registros completos de todos los cursos (o de un semestre), por fecha de inicio."""
+        return [rec for c in self.courses(semester) if (rec := self.load(c["id"])) is not None]
+
+    def put_course(self, record: Dict[str, Any], name: Optional[str] = None, semester: Optional[str] = None) -> int:
+        """Crea o reemplaza un curso completo (cabecera y todas sus semanas); retorna su id.
+
+        ``record`` se normaliza como una fila de manifiesto (_parse_course()). El nombre y el
+        semestre salen de los argumentos, del registro o, si faltan, del título y de la fecha
+        de inicio (semester_of()).
+        """
+        spec = _parse_course(record)
+        name = _safe_filename(name) if name else spec.name
+        semester = semester or str(record.get("semester") or "").strip() or semester_of(spec.start)
+        header = {
+            "title": spec.title,
+            "subtitle": spec.subtitle,
+            "start_date": spec.start.isoformat(),
+            "weeks": spec.weeks,
+            "exam_dates": [d.isoformat() for d in spec.exam_dates],
+        }
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR IGNORE INTO courses (name, semester, title, subtitle, start_date, weeks, exam_dates, updated)"
+                " VALUES (?, ?, '', '', ?, 0, '[]', 0)",
+                (name, semester, header["start_date"]),
+            )
+            (course_id,) = self._db.execute(
+                "SELECT id FROM courses WHERE name = ? AND semester = ?", (name, semester)
+            ).fetchone()
+            self._update(course_id, header, dict(spec.entries.items()), replace=True)
+        return course_id
+
+    def update_course(
+        self,
+        course_id: int,
+        header: Optional[Dict[str, Any]] = None,
+        weeks: Optional[Dict[Any, Sequence[str]]] = None,
+        replace: bool = False,
+    ) -> None:
+        """Actualiza la cabecera y sólo las semanas indicadas, en una transacción.
+
+        Una semana con los 4 textos vacíos se borra. Sin ``replace`` las demás semanas no se
+        tocan; con ``replace=True`` ``weeks`` son todas las semanas del curso y las que no
+        aparezcan se borran (así se recortan al reducir el número de semanas). Cualquier cambio,
+        aunque sea sólo de textos, actualiza la fecha de modificación que usa latest().
+        """
+        with self._lock, self._db:
+            self._update(course_id, header, weeks or {}, replace)
+
+    def _update(
+        self, course_id: int, header: Optional[Dict[str, Any]], weeks: Dict[Any, Sequence[str]], replace: bool
+    ) -> None:
+        db = self._db
+        if header is not None:
+            exams = sorted(str(d) for d in header.get("exam_dates") or [])
+            db.execute(
+                "UPDATE courses SET title = ?, subtitle = ?, start_date = ?, weeks = ?, exam_dates = ?, updated = ?"
+                " WHERE id = ?",
+                (
+                    str(header.get("title") or ""),
+                    str(header.get("subtitle") or ""),
+                    str(header["start_date"]),
+                    int(header.get("weeks") or 18),
+                    json.dumps(exams),
+                    time.time(),
+                    course_id,
+                ),
+            )
+        if replace:
+            # Reescritura completa (curso nuevo o recalculado): sólo aquí se borran semanas que ya no están
+            db.execute("DELETE FROM entries WHERE course_id = ?", (course_id,))
+        rows = []
+        empty = []
+        for semana, texts in weeks.items():
+            vals = [str(t or "") for t in list(texts)[: len(_STORE_COLUMNS)]]
+            vals += [""] * (len(_STORE_COLUMNS) - len(vals))
+            if any(vals):
+                rows.append((course_id, int(semana), *vals))
+            elif not replace:
+                empty.append((course_id, int(semana)))
+        if empty:
+            db.executemany("DELETE FROM entries WHERE course_id = ? AND semana = ?", empty)
+        if rows:
+            marks = ", ".join("?" * (len(_STORE_COLUMNS) + 2))
+            db.executemany(
+                f"INSERT OR REPLACE INTO entries (course_id, semana, {', '.join(_STORE_COLUMNS)}) VALUES ({marks})",
+                rows,
+            )
+        if header is None and (rows or empty):
+            # Cambiaron sólo textos: latest() y el orden por modificación también deben verlo
+            db.execute("UPDATE courses SET updated = ? WHERE id = ?", (time.time(), course_id))
+
+    def delete_course(self, course_id: int) -> None:
+        with self._lock, self._db:
+            self._db.execute("DELETE FROM courses WHERE id = ?", (course_id,))
+
+    def import_json(self, path: str, semester: Optional[str] = None) -> int:
+        """Importa un respaldo JSON (o un manifiesto JSON/CSV del modo por lotes); retorna los cursos."""
+        records = load_manifest(path)
+        for rec in records:
+            self.put_course(rec, semester=semester)
+        return len(records)
+
+    def import_excel(self, paths: Sequence[str], semester: Optional[str] = None) -> Tuple[int, int]:
+        """Importa Excel editados (read_excel()); retorna (cursos actualizados, cursos nuevos).
+
+        Si el curso ya está en el almacén (mismo nombre y semestre) sólo se reemplazan los
+        textos de las semanas de la hoja; la cabecera guardada (fechas, exámenes) se conserva.
+        Si no, se crea con la cabecera reconstruida del archivo. Los archivos se leen de a uno.
+        """
+        updated = created = 0
+        for path in paths:
+            for rec in read_excel(path):
+                sem = semester or semester_of(date.fromisoformat(rec["start_date"]))
+                course_id = self.find(rec["name"], sem)
+                if course_id is None:
+                    self.put_course(rec, semester=sem)
+                    created += 1
+                else:
+                    self.update_course(course_id, weeks=rec["entries"])
+                    updated += 1
+        return updated, created
+
+    def export_json(self, path: str, name: Optional[str] = None, semester: Optional[str] = None) -> int:
+        """Exporta a JSON: un curso (``name``) en el formato del respaldo, o una lista de cursos
+        (todos o los de ``semester``) que sirve como manifiesto de ``--batch``. Retorna los cursos."""
+        if name is not None:
+            course_id = self.find(name, semester)
+            if course_id is None:
+                raise ValueError(f"No existe el curso {name}" + (f" ({semester})" if semester else ""))
+            write_json_atomic(path, self.load(course_id), indent=2)
+            return 1
+        records = self.records(semester)
+        write_json_atomic(path, records, indent=2)
+        return len(records)
+
+
+# ---------- Caché de exportaciones (direccionada por contenido) ----------
+# Súbelo cuando cambie el diseño de cualquier exportador: invalida todo lo guardado
+EXPORT_CACHE_VERSION = 1
+
+
+def export_cache_key(
+    fmt: str,
+    title: str,
+    subtitle: str,
+    week_dates: Sequence[WeekDates],
+    entries: Dict[int, Tuple[str, str, str, str]],
+    holidays_map: Dict[date, str],
+    exam_dates: Set[date],
+    **options: Any,
+) -> str:
+    """Hash SHA-256 estable de todo lo que determina un archivo exportado.
+
+    Incluye formato, opciones del exportador (motor, modo, ...), EXPORT_CACHE_VERSION y sólo
+    los textos de las semanas exportadas, así que dos llamadas con las mismas entradas dan
+    la misma clave en cualquier proceso o ejecución.
+    """
+    import hashlib
+
+    payload = [
+        EXPORT_CACHE_VERSION,
+        fmt,
+        sorted(options.items()),
+        title,
+        subtitle,
+        [(w.semana, w.lunes.toordinal()) for w in week_dates],
+        [list(entries.get(w.semana, ("", "", "", ""))) for w in week_dates],
+        sorted((d.toordinal(), n) for d, n in holidays_map.items()),
+        sorted(d.toordinal() for d in exam_dates),
+    ]
+    raw = json.dumps(payload, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _ExportCache:
+    """Archivos exportados guardados en disco bajo su export_cache_key().
+
+    Un acierto copia el archivo guardado a la ruta de salida (o crea un enlace duro con
+    ``link=True``) en lugar de volver a generarlo. El orden LRU es el mtime de cada archivo,
+    que se actualiza en cada acierto. Cada proceso lleva una estimación del tamaño total y
+    sólo recorre la carpeta (evict()) cuando la estimación pasa de ``max_bytes``; el modo por
+    lotes hace además un evict() final. Como todo el estado vive en el disco, varios procesos
+    pueden compartir la misma carpeta. Sin ``root`` la caché está desactivada.
+    """
+
+    def __init__(self, root: Optional[str] = None, max_bytes: int = 256 << 20, link: bool = False) -> None:
+        self.root = root
+        self.max_bytes = max_bytes
+        self.link = link
+        self.hits = 0
+        self.misses = 0
+        self._size: Optional[int] = None  # bytes en disco según el último evict() + lo guardado después
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.root)
+
+    def _path(self, key: str, ext: str) -> str:
+        return os.path.join(self.root or "", key[:2], key + ext)
+
+    def fetch(self, key: str, out_path: str) -> bool:
+        """Copia (o enlaza) el archivo de ``key`` a ``out_path``; False si no está guardado."""
+        import shutil
+
+        src = self._path(key, os.path.splitext(out_path)[1])
+        tmp = f"{out_path}.{os.getpid()}.tmp"
+        try:
+            try:
+                if not self.link:
+                    raise OSError
+                os.link(src, tmp)
+            except OSError:
+                shutil.copyfile(src, tmp)
+            os.utime(src)  # último uso, para el orden LRU
+            os.replace(tmp, out_path)
+            return True
+        except OSError:
+            return False  # no está (o lo expulsó otro proceso mientras tanto)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def store(self, key: str, path: str) -> None:
+        """Guarda una copia de ``path`` bajo ``key`` y aplica el límite de tamaño."""
+        import shutil
+
+        dst = self._path(key, os.path.splitext(path)[1])
+        tmp = f"{dst}.{os.getpid()}.tmp"
+        try:
+            os.makedirs(os.path.dirname(dst), exist_ok=True)
+            shutil.copyfile(path, tmp)
+            os.replace(tmp, dst)
+        finally:
+            if os.path.exists(tmp):
+                os.remove(tmp)
+        if self._size is None:
+            self.evict()
+        else:
+            self._size += os.path.getsize(dst)
+            if self._size > self.max_bytes:
+                self.evict()
+
+    def evict(self) -> int:
+        """Borra los archivos menos usados hasta quedar bajo ``max_bytes``; retorna los bytes liberados."""
+        if not self.root or not os.path.isdir(self.root):
+            return 0
+        files: List[Tuple[float, int, str]] = []
+        for sub in os.scandir(self.root):
+            if not sub.is_dir():
+                continue
+            for f in os.scandir(sub.path):
+                if f.name.endswith(".tmp"):
+                    continue
+                try:
+                    st = f.stat()
+                except OSError:
+                    continue
+                files.append((st.st_mtime, st.st_size, f.path))
+        total = sum(size for _, size, _ in files)
+        freed = 0
+        for _, size, path in sorted(files):
+            if total - freed <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue  # otro proceso ya lo borró
+            freed += size
+        self._size = total - freed
+        return freed
+
+    def export(self, out_path: str, key: str, build: Callable[[str], None]) -> bool:
+        """Escribe ``out_path`` desde la caché o con ``build(out_path)``; True si fue un acierto."""
+        if not self.enabled:
+            build(out_path)
+            return False
+        with TRACER.span("cache.fetch") as span:
+            hit = self.fetch(key, out_path)
+            if TRACER.enabled:
+                span.args["hit"] = hit
+        if hit:
+            self.hits += 1
+            return True
+        self.misses += 1
+        if os.path.exists(out_path) and os.stat(out_path).st_nlink > 1:
+            # Enlace duro a un archivo de la caché: escribir encima lo corrompería
+            os.remove(out_path)
+        build(out_path)
+        with TRACER.span("cache.store"):
+            self.store(key, out_path)
+        return False
+
+
+# Caché global. CALENDARIO_EXPORT_CACHE=<carpeta> la activa, CALENDARIO_EXPORT_CACHE_MB fija el
+# límite (256 MB por defecto) y CALENDARIO_EXPORT_CACHE_LINK=1 usa enlaces duros en vez de copias.
+EXPORT_CACHE = _ExportCache(
+    root=os.environ.get("CALENDARIO_EXPORT_CACHE") or None,
+    max_bytes=int(os.environ.get("CALENDARIO_EXPORT_CACHE_MB") or 256) << 20,
+    link=os.environ.get("CALENDARIO_EXPORT_CACHE_LINK") == "1",
+)
+
+
+# ---------- Modo por lotes (sin GUI) ----------
+@dataclass(slots=True)
+class CourseSpec:
+    """Datos de un curso tal como se guardan en ``calendario_backup.json``."""
+    name: str
+    title: str
+    subtitle: str
+    start: date
+    weeks: int
+    exam_dates: Set[date]
+    entries: EntryTable
+
+
+def _safe_filename(text: str) -> str:
+    """Convierte un título en un nombre de archivo seguro (sin separadores ni caracteres raros)."""
+    keep = [ch if ch.isalnum() or ch in "-_." else "_" for ch in text.strip()]
+    out = "".join(keep).strip("._")
+    while "__" in out:
+        out = out.replace("__", "_")
+    return out or "calendario"
+
+
+def _parse_course(rec: Dict[str, Any]) -> CourseSpec:
+    """Normaliza un registro del manifiesto (mismos campos que el respaldo JSON)."""
+    title = str(rec.get("title") or "").strip() or "Calendario de sesiones"
+    subtitle = str(rec.get("subtitle") or "").strip()
+    start = rec.get("start_date")
+    if not isinstance(start, str) or not start.strip():
+        raise ValueError("start_date es obligatorio (formato AAAA-MM-DD)")
+    weeks_raw = rec.get("weeks")
+    # Sólo un valor ausente toma el valor por defecto: 0 debe fallar la validación
+    weeks = 18 if weeks_raw is None or str(weeks_raw).strip() == "" else int(weeks_raw)
+    if not 1 <= weeks <= MAX_WEEKS:
+        # Un valor fuera de rango generaría calendarios (y archivos) de tamaño arbitrario
+        raise ValueError(f"weeks debe estar entre 1 y {MAX_WEEKS} (se recibió {weeks})")
+
+    exams_raw = rec.get("exam_dates") or []
+    if isinstance(exams_raw, str):
+        # CSV: fechas separadas por ';' o '|'
+        exams_raw = [s for s in exams_raw.replace("|", ";").split(";") if s.strip()]
+    exam_dates = {date.fromisoformat(str(s).strip()) for s in exams_raw}
+
+    entries_raw = rec.get("entries") or {}
+    if isinstance(entries_raw, str):
+        # CSV: columna con el mismo objeto JSON que usa el respaldo
+        entries_raw = json.loads(entries_raw) if entries_raw.strip() else {}
+    # Los textos se codifican en la tabla de temas compartida (TOPICS): con cientos de cursos
+    # en memoria, los temas repetidos se guardan una sola vez
+    entries = EntryTable()
+    for semana, texts in entries_raw.items():
+        vals = [str(t or "") for t in list(texts)[:4]]
+        vals += [""] * (4 - len(vals))
+        entries[int(semana)] = vals
+
+    name = str(rec.get("name") or rec.get("id") or "").strip() or title
+    return CourseSpec(
+        name=_safe_filename(name),
+        title=title,
+        subtitle=subtitle,
+        start=date.fromisoformat(start.strip()),
+        weeks=weeks,
+        exam_dates=exam_dates,
+        entries=entries,
+    )
+
+
+def load_manifest(path: str, semester: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Lee un manifiesto de cursos en JSON, CSV o un almacén SQLite.
+
+    - JSON: una lista de objetos, un objeto ``{"courses": [...]}`` o un único respaldo.
+    - CSV: una fila por curso con columnas ``title, subtitle, start_date, weeks, exam_dates``
+      (fechas separadas por ';') y opcionalmente ``entries`` (JSON) y ``name``.
+    - .db/.sqlite: los cursos de un CalendarStore (sólo los de ``semester`` si se indica).
+    """
+    if path.lower().endswith(STORE_EXTENSIONS):
+        if not os.path.exists(path):
+            raise FileNotFoundError(path)  # sqlite3 crearía una base vacía
+        store = CalendarStore(path)
+        try:
+            return store.records(semester)
+        finally:
+            store.close()
+    if path.lower().endswith(".csv"):
+        import csv
+
+        with open(path, "r", encoding="utf-8-sig", newline="") as f:
+            return [dict(row) for row in csv.DictReader(f)]
+    with open(path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get("courses", [data])
+    if not isinstance(data, list):
+        raise ValueError("El manifiesto JSON debe ser una lista de cursos")
+    return data
+
+
+def _export_course(
+    job: Tuple[CourseSpec, str, Tuple[str, ...], str, str, bool]
+) -> Tuple[str, Optional[str], float, int, int, List[Dict[str, Any]]]:
+    """Exporta un curso (se ejecuta dentro de un proceso del pool).
+
+    Retorna (nombre, error o None, segundos, archivos generados, archivos tomados de la caché,
+    eventos de traza). Los errores se devuelven como texto para que un curso fallido no
+    detenga el lote.
+    """
+    course, out_dir, formats, pdf_mode, excel_engine, deterministic = job
+    t0 = time.perf_counter()
+    written = 0
+    cached = 0
+    err: Optional[str] = None
+    with TRACER.span("batch.course", course=course.name):
+        try:
+            week_dates = compute_weeks(course.start, course.weeks)
+            holidays_map = get_colombia_holidays(course.start, week_dates[-1].miercoles)
+            model = build_calendar_model(week_dates, holidays_map, course.exam_dates)
+            base = os.path.join(out_dir, course.name)
+            inputs = (course.title, course.subtitle, week_dates, course.entries, holidays_map, course.exam_dates)
+            if "xlsx" in formats:
+                key = export_cache_key("xlsx", *inputs, engine=excel_engine, deterministic=deterministic)
+                cached += EXPORT_CACHE.export(base + ".xlsx", key, lambda path: build_excel(
+                    path, *inputs, streaming=True, model=model, engine=excel_engine, deterministic=deterministic
+                ))
+                written += 1
+            if "pdf" in formats:
+                key = export_cache_key("pdf", *inputs, mode=pdf_mode, deterministic=deterministic)
+                cached += EXPORT_CACHE.export(base + ".pdf", key, lambda path: build_pdf(
+                    path, *inputs, model=model, mode=pdf_mode, deterministic=deterministic
+                ))
+                written += 1
+            if "ics" in formats:
+                key = export_cache_key("ics", *inputs, deterministic=deterministic, course_key=course.name)
+                cached += EXPORT_CACHE.export(base + ".ics", key, lambda path: build_ics(
+                    path, *inputs, model=model, deterministic=deterministic, course_key=course.name
+                ))
+                written += 1
+        except Exception as e:
+            err = f"{type(e).__name__}: {e}"
+    events = TRACER.drain() if TRACER.enabled else []
+    return course.name, err, time.perf_counter() - t0, written, cached, events
+
+
+def merge_pdfs(parts: Sequence[Tuple[str, str]], out_path: str) -> None:
+    """Une varios PDF en uno solo, con un marcador (bookmark) por parte.
+
+    ``parts`` es una lista de (ruta, título del marcador) en el orden de salida; las páginas
+    se copian tal cual, así que el resultado no depende de cómo se generaron las partes.
+    Requiere la librería pypdf. Si no está, se lanza un RuntimeError controlado.
+    """
+    try:
+        from pypdf import PdfWriter
+    except ImportError:
+        raise RuntimeError("pypdf no está instalado. Instálalo para unir los PDF de los cursos.")
+
+    writer = PdfWriter()
+    for path, label in parts:
+        writer.append(path, outline_item=label)
+    writer.page_mode = "/UseOutlines"  # abrir con el panel de marcadores visible
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        with open(tmp, "wb") as f:
+            writer.write(f)
+        os.replace(tmp, out_path)
+    finally:
+        writer.close()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+# Hoja índice de build_workbook(): columnas, anchos y color de los vínculos a cada hoja
+WORKBOOK_INDEX_SHEET = "Índice"
+# "Curso" guarda el nombre completo: la hoja puede estar recortada a 31 caracteres o llevar "~N",
+# y read_excel() lo usa para asociar cada hoja con su curso al importar el libro
+_INDEX_HEADERS = ("Hoja", "Curso", "Título", "Subtítulo", "Inicio", "Semanas", "Exámenes")
+_INDEX_WIDTHS = [24, 32, 40, 40, 12, 10, 10]
+_INDEX_LINK_COLOR = "0563C1"
+# Caracteres que Excel no admite en nombres de hoja (máx. 31 caracteres)
+_SHEET_FORBIDDEN = str.maketrans({ch: "_" for ch in "[]:*?/\\"})
+
+
+def _sheet_title(name: str, used: Set[str]) -> str:
+    """Nombre de hoja válido y único (sin distinguir mayúsculas) a partir del nombre del curso."""
+    base = name.translate(_SHEET_FORBIDDEN).strip("' ")[:31] or "Curso"
+    title, n = base, 1
+    while title.casefold() in used:
+        n += 1
+        suffix = f"~{n}"
+        title = base[: 31 - len(suffix)] + suffix
+    used.add(title.casefold())
+    return title
+
+
+def build_workbook(
+    out_path: str,
+    courses: Sequence[CourseSpec],
+    engine: str = "openpyxl",
+    progress: Optional[ProgressCallback] = None,
+    deterministic: bool = False,
+) -> List[str]:
+    """Escribe varios cursos en un solo libro: una hoja índice y una hoja por curso.
+
+    Cada hoja tiene el mismo diseño que build_excel(). Los estilos (o Format de XlsxWriter) se
+    registran una sola vez en el libro y todas las hojas los comparten, así que el tamaño del
+    archivo crece con las celdas y no con la cantidad de cursos. Las hojas se escriben en
+    streaming (write-only de openpyxl, o constant_memory de XlsxWriter) y cada hoja de openpyxl
+    se cierra al terminar su curso, por lo que la memoria no depende del número de cursos.
+    El índice enlaza a cada hoja y guarda el nombre completo de su curso (read_excel() lo usa
+    al importar el libro). El libro se arma en un temporal y se renombra al final.
+    ``progress(hechos, total)`` se llama después de cada curso y ``deterministic`` tiene el
+    mismo efecto que en build_excel(). Retorna los nombres de hoja de los cursos, en orden.
+    """
+    if engine not in EXCEL_ENGINES:
+        raise ValueError(f"Motor de Excel desconocido: {engine} (use {', '.join(EXCEL_ENGINES)})")
+    used = {WORKBOOK_INDEX_SHEET.casefold()}
+    sheets = [_sheet_title(c.name, used) for c in courses]
+    rows = [
+        (sheet, c.name, c.title, c.subtitle, c.start.isoformat(), c.weeks, len(c.exam_dates))
+        for sheet, c in zip(sheets, courses)
+    ]
+
+    def calendar(course: CourseSpec) -> Sequence[CalendarWeek]:
+        week_dates = compute_weeks(course.start, course.weeks)
+        holidays_map = get_colombia_holidays(course.start, week_dates[-1].miercoles)
+        return build_calendar_model(week_dates, holidays_map, course.exam_dates)
+
+    tmp = f"{out_path}.{os.getpid()}.tmp"
+    try:
+        if engine == "xlsxwriter":
+            _workbook_xlsxwriter(tmp, courses, sheets, rows, calendar, progress, deterministic)
+        else:
+            _workbook_openpyxl(tmp, courses, sheets, rows, calendar, progress, deterministic)
+        os.replace(tmp, out_path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+    return sheets
+
+
+def _workbook_openpyxl(
+    path: str,
+    courses: Sequence[CourseSpec],
+    sheets: List[str],
+    rows: List[Tuple[Any, ...]],
+    calendar: Callable[[CourseSpec], Sequence[CalendarWeek]],
+    progress: Optional[ProgressCallback],
+    deterministic: bool,
+) -> None:
+    """build_workbook() con un libro write-only de openpyxl."""
+    with TRACER.span("workbook.setup", courses=len(courses)):
+        from openpyxl import Workbook
+        from openpyxl.styles import Font
+        from openpyxl.utils import get_column_letter
+        from openpyxl.worksheet.hyperlink import Hyperlink
+
+        wb = Workbook(write_only=True)
+        index = wb.create_sheet(WORKBOOK_INDEX_SHEET)
+        styles = dict(_excel_styles())
+        styles["link"] = {**styles["normal"], "font": Font(color=_INDEX_LINK_COLOR, underline="single")}
+        cell = _write_only_cells(index, styles)
+
+    with TRACER.span("workbook.index", courses=len(courses)):
+        for i, w in enumerate(_INDEX_WIDTHS, start=1):
+            index.column_dimensions[get_column_letter(i)].width = w
+        last = get_column_letter(len(_INDEX_HEADERS))
+        index.merged_cells.add(f"A1:{last}1")
+        index.append([cell(WORKBOOK_INDEX_SHEET, "title")])
+        index.merged_cells.add(f"A2:{last}2")
+        index.append([cell(f"{len(courses)} cursos", "subtitle")])
+        index.append([])
+        index.append([cell(h, "day") for h in _INDEX_HEADERS])
+        for sheet, *rest in rows:
+            link = cell(sheet, "link")
+            quoted = sheet.replace("'", "''")
+            link.hyperlink = Hyperlink(ref="", location=f"'{quoted}'!A1", display=sheet)
+            index.append([link] + [cell(v, "normal") for v in rest])
+        index.close()
+
+    for n, (course, sheet) in enumerate(zip(courses, sheets), start=1):
+        with TRACER.span("workbook.course", course=course.name):
+            ws = wb.create_sheet(sheet)
+            _write_only_calendar(ws, cell, course.title, course.subtitle, calendar(course), course.entries)
+            ws.close()  # vuelca la hoja a su temporal y libera el descriptor
+        if progress is not None:
+            progress(n, len(courses))
+
+    with TRACER.span("excel.save", sheets=len(courses) + 1):
+        _save_openpyxl(wb, path, deterministic)
+
+
+def _workbook_xlsxwriter(
+    path: str,
+    courses: Sequence[CourseSpec],
+    sheets: List[str],
+    rows: List[Tuple[Any, ...]],
+    calendar: Callable[[CourseSpec], Sequence[CalendarWeek]],
+    progress: Optional[ProgressCallback],
+    deterministic: bool,
+) -> None:
+    """build_workbook() con XlsxWriter en modo constant_memory."""
+    try:
+        import xlsxwriter  # type: ignore
+    except ImportError:
+        raise RuntimeError("XlsxWriter no está instalado. Instálalo para usar el motor xlsxwriter.")
+
+    wb = xlsxwriter.Workbook(path, {"constant_memory": True})
+    if deterministic:
+        wb.set_properties({"created": _deterministic_datetime()})
+    try:
+        with TRACER.span("workbook.setup", courses=len(courses), engine="xlsxwriter"):
+            fmt = _xlsxwriter_formats(wb)
+            fmt["link"] = wb.add_format(
+                {**_XLSXWRITER_STYLES["normal"], "font_color": f"#{_INDEX_LINK_COLOR}", "underline": 1}
+            )
+            index = wb.add_worksheet(WORKBOOK_INDEX_SHEET)
+
+        with TRACER.span("workbook.index", courses=len(courses), engine="xlsxwriter"):
+            for i, w in enumerate(_INDEX_WIDTHS):
+                index.set_column_pixels(i, i, round(w * 7))
+            last = len(_INDEX_HEADERS) - 1
+            index.merge_range(0, 0, 0, last, WORKBOOK_INDEX_SHEET, fmt["title"])
+            index.merge_range(1, 0, 1, last, f"{len(courses)} cursos", fmt["subtitle"])
+            for col, h in enumerate(_INDEX_HEADERS):
+                index.write_string(3, col, h, fmt["day"])
+            for r, (sheet, *rest) in enumerate(rows, start=4):
+                quoted = sheet.replace("'", "''")
+                index.write_url(r, 0, f"internal:'{quoted}'!A1", fmt["link"], string=sheet)
+                for col, v in enumerate(rest, start=1):
+                    if isinstance(v, str):
+                        index.write_string(r, col, v, fmt["normal"])
+                    else:
+                        index.write_number(r, col, v, fmt["normal"])
+
+        for n, (course, sheet) in enumerate(zip(courses, sheets), start=1):
+            with TRACER.span("workbook.course", course=course.name, engine="xlsxwriter"):
+                ws = wb.add_worksheet(sheet)
+                _xlsxwriter_calendar(ws, fmt, course.title, course.subtitle, calendar(course), course.entries)
+            if progress is not None:
+                progress(n, len(courses))
+
+        with TRACER.span("excel.save", sheets=len(courses) + 1, engine="xlsxwriter"):
+            wb.close()
+    finally:
+        if not wb.fileclosed:
+            # Cancelado o con error: cerrar libera los temporales de constant_memory
+            try:
+                wb.close()
+            except Exception:
+                pass
+
+
+def run_batch(
+    manifest_path: str,
+    out_dir: str,
+    workers: Optional[int] = None,
+    formats: Tuple[str, ...] = ("xlsx", "pdf"),
+    pdf_mode: str = "platypus",
+    merge_pdf: Optional[str] = None,
+    excel_engine: str = "openpyxl",
+    workbook: Optional[str] = None,
+    deterministic: bool = False,
+    semester: Optional[str] = None,
+    ics_feed: Optional[str] = None,
+    sessions: Optional[str] = None,
+) -> int:
+    """Genera los calendarios de todos los cursos de un manifiesto sin abrir la GUI.
+
+    Reparte los cursos en un pool de procesos (``workers``; 1 = en el mismo proceso) e
+    imprime al final un resumen de rendimiento y fallos. ``pdf_mode`` se pasa a build_pdf()
+    (ver PDF_MODES) y ``excel_engine`` a build_excel() (ver EXCEL_ENGINES). Con ``merge_pdf``
+    los PDF de cada curso (generados en paralelo) se unen además en ese archivo, en el orden
+    del manifiesto y con un marcador por curso; como sólo se copian páginas, el resultado es
+    el mismo con 1 o con N procesos. Con ``workbook`` se escribe además un solo libro con
+    una hoja por curso y un índice (build_workbook()); para no generar también un .xlsx por
+    curso, combínalo con ``formats=("pdf",)``. ``deterministic`` se pasa a todos los
+    exportadores: un curso sin cambios produce los mismos bytes. El manifiesto puede ser un
+    almacén SQLite (CalendarStore); ``semester`` limita entonces el lote a ese semestre.
+    Con ``ics_feed`` se escribe además un solo .ics con las sesiones de todos los cursos
+    (build_ics_feed(), en streaming) y con ``sessions`` una tabla CSV/Parquet con una fila
+    por sesión (write_sessions()). Retorna 0 si no hubo fallos.
+    """
+    from concurrent.futures import ProcessPoolExecutor
+
+    t0 = time.perf_counter()
+    failures: List[Tuple[str, str]] = []
+    courses: List[CourseSpec] = []
+    used: Dict[str, int] = {}
+    bad_rows = 0
+    for i, rec in enumerate(load_manifest(manifest_path, semester), start=1):
+        try:
+            course = _parse_course(rec)
+        except Exception as e:
+            failures.append((f"fila {i}", f"{type(e).__name__}: {e}"))
+            bad_rows += 1
+            continue
+        # Evitar que dos cursos con el mismo título se sobrescriban
+        n = used.get(course.name, 0)
+        used[course.name] = n + 1
+        if n:
+            course.name = f"{course.name}_{n + 1}"
+        courses.append(course)
+
+    if merge_pdf and "pdf" not in formats:
+        formats = tuple(formats) + ("pdf",)
+    os.makedirs(out_dir, exist_ok=True)
+    jobs = [(c, out_dir, formats, pdf_mode, excel_engine, deterministic) for c in courses]
+    workers = max(1, workers or os.cpu_count() or 1)
+    if workers == 1 or len(jobs) <= 1:
+        results = [_export_course(j) for j in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_export_course, jobs, chunksize=max(1, len(jobs) // (workers * 4))))
+
+    files = 0
+    from_cache = 0
+    busy = 0.0
+    for name, err, secs, written, cached, events in results:
+        files += written
+        from_cache += cached
+        busy += secs
+        if err:
+            failures.append((name, err))
+        TRACER.extend(events)
+    if EXPORT_CACHE.enabled:
+        EXPORT_CACHE.evict()  # los procesos sólo estiman el tamaño: aquí se aplica el límite exacto
+
+    merge_error: Optional[str] = None
+    if merge_pdf:
+        failed = {name for name, _ in failures}
+        parts = [
+            (os.path.join(out_dir, c.name + ".pdf"), f"{c.title} — {c.subtitle}" if c.subtitle else c.title)
+            for c in courses if c.name not in failed
+        ]
+        try:
+            with TRACER.span("batch.merge", parts=len(parts)):
+                merge_pdfs(parts, merge_pdf)
+        except Exception as e:
+            merge_error = f"{type(e).__name__}: {e}"
+    workbook_error: Optional[str] = None
+    if workbook:
+        failed = {name for name, _ in failures}
+        sheets = [c for c in courses if c.name not in failed]
+        try:
+            with TRACER.span("batch.workbook", courses=len(sheets)):
+                build_workbook(workbook, sheets, engine=excel_engine, deterministic=deterministic)
+        except Exception as e:
+            workbook_error = f"{type(e).__name__}: {e}"
+    ics_error: Optional[str] = None
+    ics_count = 0
+    if ics_feed:
+        failed = {name for name, _ in failures}
+        try:
+            ics_count = build_ics_feed(ics_feed, (c for c in courses if c.name not in failed),
+                                       deterministic=deterministic)
+        except Exception as e:
+            ics_error = f"{type(e).__name__}: {e}"
+    sessions_error: Optional[str] = None
+    session_rows = 0
+    if sessions:
+        failed = {name for name, _ in failures}
+        try:
+            session_rows = write_sessions(sessions, (c for c in courses if c.name not in failed))
+        except Exception as e:
+            sessions_error = f"{type(e).__name__}: {e}"
+    elapsed = time.perf_counter() - t0
+    total = len(courses) + bad_rows
+    ok = total - len(failures)
+
+    print(f"Cursos: {total}  OK: {ok}  Fallidos: {len(failures)}  Archivos: {files}")
+    print(f"Tiempo total: {elapsed:.2f} s  ({ok / elapsed if elapsed else 0:.1f} cursos/s, {workers} procesos)")
+    if results:
+        print(f"Tiempo medio por curso: {busy / len(results) * 1000:.1f} ms")
+    if EXPORT_CACHE.enabled:
+        print(f"Desde caché: {from_cache} de {files} archivos ({EXPORT_CACHE.root})")
+    if merge_pdf:
+        if merge_error:
+            print(f"  ERROR PDF combinado {merge_pdf}: {merge_error}")
+        else:
+            print(f"PDF combinado: {merge_pdf} ({len(parts)} cursos)")
+    if workbook:
+        if workbook_error:
+            print(f"  ERROR libro {workbook}: {workbook_error}")
+        else:
+            print(f"Libro Excel: {workbook} ({len(sheets)} hojas de curso + índice)")
+    if ics_feed:
+        if ics_error:
+            print(f"  ERROR calendario {ics_feed}: {ics_error}")
+        else:
+            print(f"Calendario iCalendar: {ics_feed} ({ics_count} cursos)")
+    if sessions:
+        if sessions_error:
+            print(f"  ERROR sesiones {sessions}: {sessions_error}")
+        else:
+            print(f"Tabla de sesiones: {sessions} ({session_rows} filas)")
+    for name, err in failures:
+        print(f"  ERROR {name}: {err}")
+    return 1 if failures or merge_error or workbook_error or ics_error or sessions_error else 0
+
+
+class _WeekRow:
+    """Fila reutilizable de la grilla virtual: etiqueta + 4 Text, enlazada a una semana."""
+    __slots__ = ("frame", "label", "texts", "window", "week")
+
+    def __init__(self, frame: Any, label: Any, texts: Tuple[Any, ...], window: int) -> None:
+        self.frame = frame
+        self.label = label
+        self.texts = texts
+        self.window = window
+        self.week: Optional[CalendarWeek] = None
 
 
 class CalendarGUI:
@@ -346,12 +3069,28 @@ class CalendarGUI:
     - Deshabilitar celdas de días festivos con el mensaje "No hay clase".
     - Exportar a Excel/PDF con los datos ingresados.
     """
-    def __init__(self, root: tk.Tk, start: date = date(2025, 8, 18), weeks: int = 18) -> None:  # type: ignore[name-defined]
+    def __init__(
+        self,
+        root: tk.Tk,  # type: ignore[name-defined]
+        start: date = date(2025, 8, 18),
+        weeks: int = 18,
+        store_path: Optional[str] = None,
+        course: Optional[str] = None,
+        semester: Optional[str] = None,
+    ) -> None:
         self.root = root
         self.root.title("Generador de Calendario de Clases")
-        self.start = start
-        self.weeks = weeks
-        self.week_dates = compute_weeks(start, weeks)
+        # Curso abierto en el almacén: ``course``/``semester`` o, si no se indican, el último editado
+        self._store_path = store_path or self._backup_path()
+        self._course_name = course
+        self._semester = semester
+        self._course_id: Optional[int] = None
+        self.store: Optional[CalendarStore] = None
+        # Leer el respaldo antes de crear widgets: semanas, festivos y grilla se calculan una vez
+        saved = self._load_backup()
+        self.start = saved.get("start", start)
+        self.weeks = saved.get("weeks", weeks)
+        self.week_dates = compute_weeks(self.start, self.weeks)
         self.end = self.week_dates[-1].miercoles
         self.holidays = get_colombia_holidays(self.start, self.end)
 
@@ -360,11 +3099,11 @@ class CalendarGUI:
         top.pack(fill=tk.X, padx=10, pady=(10, 4))
 
         ttk.Label(top, text="Título (curso)").grid(row=0, column=0, sticky=tk.W)
-        self.var_title = tk.StringVar(value="Fundamentos de Ciencias Básicas - 2025 - B")
+        self.var_title = tk.StringVar(value=saved.get("title", "Fundamentos de Ciencias Básicas - 2025 - B"))
         ttk.Entry(top, width=60, textvariable=self.var_title).grid(row=0, column=1, sticky=tk.W)
 
         ttk.Label(top, text="Subtítulo (opcional)").grid(row=1, column=0, sticky=tk.W)
-        self.var_sub = tk.StringVar(value=f"Desde {self.start.strftime('%d/%m/%Y')} por {self.weeks} semanas")
+        self.var_sub = tk.StringVar(value=saved.get("subtitle", f"Desde {self.start.strftime('%d/%m/%Y')} por {self.weeks} semanas"))
         ttk.Entry(top, width=60, textvariable=self.var_sub).grid(row=1, column=1, sticky=tk.W)
 
         # Controls: start date + weeks + update
@@ -387,7 +3126,7 @@ class CalendarGUI:
 
         ttk.Label(controls, text="Semanas:").grid(row=0, column=4, sticky=tk.W)
         self.var_weeks = tk.StringVar(value=str(self.weeks))
-        ttk.Spinbox(controls, from_=1, to=30, width=4, textvariable=self.var_weeks).grid(row=0, column=5, padx=(6, 12))
+        ttk.Spinbox(controls, from_=1, to=MAX_WEEKS, width=4, textvariable=self.var_weeks).grid(row=0, column=5, padx=(6, 12))
         ttk.Button(controls, text="Actualizar calendario", command=self.rebuild_calendar).grid(row=0, column=6)
 
         # Exams input (8 dates)
@@ -407,30 +3146,73 @@ class CalendarGUI:
                 ent = ttk.Entry(exams_frame, width=12)
                 ent.grid(row=i//4, column=(i%4)*2 + 1, padx=(0, 12), pady=2)
                 self.exam_inputs.append(ent)
+        for w, d in zip(self.exam_inputs, saved.get("exam_dates", [])):
+            try:
+                if TKCAL_OK and hasattr(w, 'set_date'):
+                    w.set_date(d)
+                else:
+                    w.delete(0, "end")
+                    w.insert(0, d.strftime("%d/%m/%Y"))
+            except Exception:
+                continue
 
-        # Contenedor con Canvas + Scrollbar para poder desplazar 18 filas cómodamente
+        # Contenedor con Canvas + Scrollbar; la grilla es virtual (sólo existen las filas visibles)
         container = ttk.Frame(root)
         container.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
-        canvas = tk.Canvas(container, height=480)
-        scrollbar = ttk.Scrollbar(container, orient="vertical", command=canvas.yview)
-        self.scroll_frame = ttk.Frame(canvas)
-        self.scroll_frame.bind(
-            "<Configure>", lambda e: canvas.configure(scrollregion=canvas.bbox("all"))
-        )
-        canvas.create_window((0, 0), window=self.scroll_frame, anchor="nw")
-        canvas.configure(yscrollcommand=scrollbar.set)
-        canvas.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
-        # Build weeks UI initially
-        self._build_weeks_ui()
+        self.canvas = tk.Canvas(container, height=480)
+        self.scrollbar = ttk.Scrollbar(container, orient="vertical", command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=self._on_yscroll)
+        self.canvas.bind("<Configure>", lambda e: self._refresh_visible())
+        self.canvas.pack(side="left", fill="both", expand=True)
+        self.scrollbar.pack(side="right", fill="y")
+
+        # Estado de la grilla virtual
+        self.model: Tuple[CalendarWeek, ...] = ()
+        self.exams: Set[date] = set()  # exámenes con los que se clasificó self.model
+        self.entry_texts: Dict[int, List[str]] = {}  # semana -> 4 textos escritos por el usuario
+        self.inputs: Dict[int, Tuple[Any, ...]] = {}  # semana visible -> 4 widgets Text
+        self._pool: List[_WeekRow] = []
+        self._header: Any = None
+        self._col_px: List[int] = []
+        self._header_h = 0
+        self._row_h = 1
+        self._row_w = 0
+
+        # Respaldo: escritura en segundo plano + autoguardado con debounce. Sólo se guardan las
+        # semanas editadas (_dirty_weeks); un curso nuevo o recalculado se guarda completo.
+        self._backup_writer = _BackupWriter(self._write_backup)
+        self._autosave_job: Any = None
+        self._dirty = False
+        self._dirty_weeks: Set[int] = set()
+        self._rewrite_all = self._course_id is None
+
+        # Build weeks UI once, with the saved texts already in the model
+        exams = self._get_exam_dates()
+        self.model = build_calendar_model(self.week_dates, self.holidays, exams)
+        if saved.get("entries"):
+            self._apply_saved_entries(saved["entries"])
+        self._build_weeks_ui(self.model, exams)
 
         # Action buttons
         actions = ttk.Frame(root)
         actions.pack(fill=tk.X, padx=10, pady=(0, 12))
-        ttk.Button(actions, text="Exportar a Excel (.xlsx)", command=self.export_excel).pack(side=tk.LEFT)
-        ttk.Button(actions, text="Exportar a PDF (.pdf)", command=self.export_pdf).pack(side=tk.LEFT, padx=10)
+        self.btn_excel = ttk.Button(actions, text="Exportar a Excel (.xlsx)", command=self.export_excel)
+        self.btn_excel.pack(side=tk.LEFT)
+        self.btn_pdf = ttk.Button(actions, text="Exportar a PDF (.pdf)", command=self.export_pdf)
+        self.btn_pdf.pack(side=tk.LEFT, padx=10)
+        self.btn_ics = ttk.Button(actions, text="Exportar a calendario (.ics)", command=self.export_ics)
+        self.btn_ics.pack(side=tk.LEFT, padx=(0, 10))
         ttk.Button(actions, text="Guardar respaldo", command=self.manual_save_backup).pack(side=tk.LEFT)
+        ttk.Button(actions, text="Importar Excel…", command=self.import_excel).pack(side=tk.LEFT, padx=10)
+
+        # Progreso de la exportación en curso (se ejecuta en un hilo aparte)
+        self.btn_cancel = ttk.Button(actions, text="Cancelar", command=self._cancel_export, state=tk.DISABLED)
+        self.btn_cancel.pack(side=tk.RIGHT)
+        self.progress = ttk.Progressbar(actions, length=220, mode="determinate")
+        self.progress.pack(side=tk.RIGHT, padx=10)
+        self._export_thread: Optional[threading.Thread] = None
+        self._export_queue: "queue.Queue[Tuple[Any, ...]]" = queue.Queue()
+        self._export_cancel = threading.Event()
 
         # Holidays notice
         self.info_label = ttk.Label(root, text=self._holidays_text())
@@ -448,8 +3230,10 @@ class CalendarGUI:
         except Exception:
             pass
 
-        # Load previous backup and apply
-        self._load_backup()
+        # Autoguardado: a partir de aquí cualquier cambio programa un respaldo
+        self._dirty = False
+        self.var_title.trace_add("write", self._mark_dirty)
+        self.var_sub.trace_add("write", self._mark_dirty)
 
     def _get_exam_dates(self) -> Set[date]:
         """Lee y valida las 8 fechas de exámenes del UI; ignora vacíos."""
@@ -495,8 +3279,11 @@ class CalendarGUI:
         Pasos:
         1) Leer fecha y número de semanas.
         2) Validar que el inicio sea lunes.
-        3) Recalcular self.week_dates y self.holidays.
-        4) Destruir la grilla anterior y volver a construirla.
+        3) Recalcular self.week_dates y self.holidays; si el inicio no cambió sólo se agregan o
+           quitan las semanas del final y se re-clasifican las semanas cuyo examen cambió.
+        4) Actualizar el modelo de celdas y re-enlazar sólo las filas visibles afectadas.
+
+        Los textos escritos se conservan por número de semana (``self.entry_texts``).
         """
         try:
             start = self._get_selected_start_date()
@@ -504,7 +3291,7 @@ class CalendarGUI:
             messagebox.showerror("Fecha inválida", f"No se pudo leer la fecha: {e}")
             return
         try:
-            weeks = int(self.var_weeks.get())
+            weeks = min(max(int(self.var_weeks.get()), 1), MAX_WEEKS)
         except Exception:
             weeks = 18
 
@@ -512,112 +3299,237 @@ class CalendarGUI:
             messagebox.showerror("Inicio inválido", "La fecha de inicio debe ser un Lunes.")
             return
 
+        exams = self._get_exam_dates()
+        if start == self.start and self.model:
+            # Mismo inicio: se conservan las CalendarWeek comunes y sólo se clasifican las nuevas
+            keep = min(weeks, len(self.week_dates))
+            week_dates = compute_weeks(start, weeks)
+            # Semanas cuyo examen (miércoles, sesión 2) cambió desde la última vez
+            changed = {
+                (d - start).days // 7 + 1
+                for d in self.exams ^ exams
+                if d.weekday() == 2 and 0 <= (d - start).days < keep * 7
+            }
+        else:
+            week_dates = compute_weeks(start, weeks)
+            changed = None
+
         self.start = start
         self.weeks = weeks
-        self.week_dates = compute_weeks(self.start, self.weeks)
+        self.week_dates = week_dates
         self.end = self.week_dates[-1].miercoles
         self.holidays = get_colombia_holidays(self.start, self.end)
 
-        # Rebuild scroll area
-        for child in self.scroll_frame.winfo_children():
-            child.destroy()
-        self._build_weeks_ui()
+        # Las filas visibles guardan su texto en el modelo antes de re-enlazarse; las semanas
+        # sin cambios conservan su CalendarWeek y sus filas no se tocan.
+        if changed is None:
+            model = build_calendar_model(self.week_dates, self.holidays, exams)
+        else:
+            model = update_calendar_model(self.model, self.week_dates, self.holidays, exams, changed)
+        self._build_weeks_ui(model, exams)
         self.info_label.config(text=self._holidays_text())
-    # Nota: no re-aplicamos entradas guardadas aquí para evitar duplicados.
+        self._rewrite_all = True  # cambian los festivos y el número de semanas: se guarda todo
+        self._mark_dirty()
 
-    def _build_weeks_ui(self) -> None:
-        """Construye la grilla de semanas sobre un único grid.
+    def _build_weeks_ui(self, model: Optional[Tuple[CalendarWeek, ...]] = None, exams: Optional[Set[date]] = None) -> None:
+        """Prepara la grilla virtual de semanas.
 
         Diseño:
-        - Fila 0: Encabezados (Semana, Lunes, Martes, Mié1, Mié2) colocados en ``self.scroll_frame``.
-        - Filas 1..N: Por cada semana, una etiqueta con el rango y 4 widgets de texto.
-        - Importante: se utiliza el mismo contenedor y las mismas columnas para mantener
-          alineados encabezados y contenido (evita desfases).
+        - Encabezados (Semana, Lunes, Martes, Mié1, Mié2) en un marco en la parte superior del canvas.
+        - Un pool de filas (etiqueta + 4 Text) del tamaño de la zona visible. Al desplazar, las filas
+          se reubican y se rellenan desde ``self.entry_texts``; no se crea un widget por semana.
+        - Encabezados y filas usan los mismos anchos de columna (en píxeles) para quedar alineados.
         """
-        for c in range(5):
-            self.scroll_frame.grid_columnconfigure(c, weight=0)
-
-        # Headers directly in scroll_frame
-        ttk.Label(self.scroll_frame, text="Semana", width=16).grid(row=0, column=0, sticky=tk.W)
-        ttk.Label(self.scroll_frame, text=f"Lunes ({CLASS_TIMES['lunes']})", width=28).grid(row=0, column=1, sticky=tk.W)
-        ttk.Label(self.scroll_frame, text=f"Martes ({CLASS_TIMES['martes']})", width=28).grid(row=0, column=2, sticky=tk.W)
-        ttk.Label(self.scroll_frame, text=f"Miércoles (Sesión 1: {CLASS_TIMES['miercoles_1']})", width=28).grid(row=0, column=3, sticky=tk.W)
-        ttk.Label(self.scroll_frame, text=f"Miércoles (Sesión 2: {CLASS_TIMES['miercoles_2']})", width=28).grid(row=0, column=4, sticky=tk.W)
-
-        # Mapa semana -> (Text lunes, Text martes, Text mié1, Text mié2)
-        self.inputs = {}
-
-        exams = self._get_exam_dates()
-        for i, wd in enumerate(self.week_dates, start=1):
-            row_idx = i
-
-            holiday_mon = wd.lunes in self.holidays
-            holiday_tue = wd.martes in self.holidays
-            holiday_wed = wd.miercoles in self.holidays
-
-            semana_lbl = f"{wd.semana} ({wd.lunes.strftime('%d/%m')} - {wd.miercoles.strftime('%d/%m')})"
-            ttk.Label(self.scroll_frame, text=semana_lbl, width=16).grid(row=row_idx, column=0, padx=(0, 6), sticky=tk.W)
-
-            def mk_text(col, day: date, is_holiday: bool) -> Any:
-                t = tk.Text(self.scroll_frame, width=28, height=3, wrap="word")
-                t.grid(row=row_idx, column=col, padx=3, sticky=tk.W)
-                if is_holiday:
-                    name = self.holidays.get(day, "Festivo")
-                    t.insert("1.0", f"Festivo: {name}\nNo hay clase")
-                    t.config(state=tk.DISABLED)
-                elif day in exams and col == 4:
-                    # Only mark exam in Wednesday Session 2 (2:00 pm - 5:00 pm)
-                    t.insert("1.0", "Examen")
-                return t
-
-            txt_mon = mk_text(1, wd.lunes, holiday_mon)
-            txt_tue = mk_text(2, wd.martes, holiday_tue)
-            txt_w1 = mk_text(3, wd.miercoles, holiday_wed)
-            txt_w2 = mk_text(4, wd.miercoles, holiday_wed)
-            self.inputs[wd.semana] = (txt_mon, txt_tue, txt_w1, txt_w2)
+        self.exams = exams if exams is not None else self._get_exam_dates()
+        self.model = model if model is not None else build_calendar_model(self.week_dates, self.holidays, self.exams)
+        if self._header is None:
+            self._create_header()
+        total_h = self._header_h + len(self.model) * self._row_h
+        self.canvas.configure(scrollregion=(0, 0, self._row_w, total_h))
+        self._refresh_visible()
+
+    def _create_header(self) -> None:
+        """Crea los encabezados y la primera fila del pool, y mide columnas/alto de fila."""
+        self._header = ttk.Frame(self.canvas)
+        titles = [
+            ("Semana", 16),
+            (f"Lunes ({CLASS_TIMES['lunes']})", 28),
+            (f"Martes ({CLASS_TIMES['martes']})", 28),
+            (f"Miércoles (Sesión 1: {CLASS_TIMES['miercoles_1']})", 28),
+            (f"Miércoles (Sesión 2: {CLASS_TIMES['miercoles_2']})", 28),
+        ]
+        labels = []
+        for c, (text, width) in enumerate(titles):
+            lbl = ttk.Label(self._header, text=text, width=width)
+            lbl.grid(row=0, column=c, sticky=tk.W)
+            labels.append(lbl)
+        self.canvas.create_window((0, 0), window=self._header, anchor="nw")
+
+        probe = self._new_row()
+        self.canvas.update_idletasks()
+        # Ancho de cada columna = el mayor entre encabezado y widget (+ su padx)
+        self._col_px = [max(labels[0].winfo_reqwidth(), probe.label.winfo_reqwidth() + 6)]
+        for lbl, t in zip(labels[1:], probe.texts):
+            self._col_px.append(max(lbl.winfo_reqwidth(), t.winfo_reqwidth() + 6))
+        for frame in (self._header, probe.frame):
+            for c, px in enumerate(self._col_px):
+                frame.grid_columnconfigure(c, minsize=px)
+        self.canvas.update_idletasks()
+        self._header_h = self._header.winfo_reqheight()
+        self._row_h = max(1, probe.frame.winfo_reqheight())
+        self._row_w = max(self._header.winfo_reqwidth(), probe.frame.winfo_reqwidth())
+        self._pool.append(probe)
+
+    def _new_row(self) -> "_WeekRow":
+        frame = ttk.Frame(self.canvas)
+        label = ttk.Label(frame, width=16)
+        label.grid(row=0, column=0, padx=(0, 6), sticky=tk.W)
+        texts = []
+        for col in range(1, 5):
+            t = tk.Text(frame, width=28, height=3, wrap="word")
+            t.grid(row=0, column=col, padx=3, sticky=tk.W)
+            t.bind("<<Modified>>", self._on_text_modified)
+            texts.append(t)
+        for c, px in enumerate(self._col_px):
+            frame.grid_columnconfigure(c, minsize=px)
+        window = self.canvas.create_window((0, 0), window=frame, anchor="nw", state="hidden")
+        return _WeekRow(frame, label, tuple(texts), window)
+
+    def _on_yscroll(self, first: str, last: str) -> None:
+        self.scrollbar.set(first, last)
+        self._refresh_visible()
+
+    def _refresh_visible(self) -> None:
+        """Enlaza las filas del pool con las semanas visibles; costo proporcional a la ventana."""
+        if self._header is None:
+            return
+        n = len(self.model)
+        height = max(self.canvas.winfo_height(), int(self.canvas.cget("height")))
+        needed = min(n, height // self._row_h + 2)
+        while len(self._pool) < needed:
+            self._pool.append(self._new_row())
+
+        pool_n = len(self._pool)
+        first = max(0, int((self.canvas.canvasy(0) - self._header_h) // self._row_h))
+        last = min(n, first + pool_n)
+        first = max(0, last - pool_n)
+
+        visible: Dict[int, Tuple[Any, ...]] = {}
+        used = set()
+        for i in range(first, last):
+            # Asignación circular: al desplazar una fila sólo se re-enlaza una fila del pool
+            row = self._pool[i % pool_n]
+            used.add(i % pool_n)
+            week = self.model[i]
+            if row.week is not week:
+                self._flush_row(row)
+                self._bind_row(row, week)
+            self.canvas.coords(row.window, 0, self._header_h + i * self._row_h)
+            self.canvas.itemconfigure(row.window, state="normal")
+            visible[week.semana] = row.texts
+        for k, row in enumerate(self._pool):
+            if k not in used:
+                self._flush_row(row)
+                row.week = None
+                self.canvas.itemconfigure(row.window, state="hidden")
+        self.inputs = visible
+
+    def _bind_row(self, row: "_WeekRow", week: CalendarWeek) -> None:
+        """Muestra en ``row`` la semana ``week`` tomando los textos del modelo."""
+        row.week = week
+        row.label.configure(text=week.range_label)
+        texts = self.entry_texts.get(week.semana, ("", "", "", ""))
+        for cell, t, txt in zip(week.cells, row.texts, texts):
+            t.config(state=tk.NORMAL)
+            t.delete("1.0", "end")
+            content = cell.text(txt)
+            if content:
+                t.insert("1.0", content)
+            if cell.kind == CELL_HOLIDAY:
+                t.config(state=tk.DISABLED)
+            t.edit_modified(False)
+
+    def _flush_row(self, row: "_WeekRow") -> None:
+        """Guarda en ``self.entry_texts`` las celdas modificadas de una fila."""
+        if row.week is None:
+            return
+        vals = self.entry_texts.setdefault(row.week.semana, ["", "", "", ""])
+        for i, t in enumerate(row.texts):
+            # Sólo se leen las celdas editadas desde el último volcado
+            if t.edit_modified():
+                vals[i] = self._read_text(t)
+                t.edit_modified(False)
+                self._dirty_weeks.add(row.week.semana)
+
+    @staticmethod
+    def _read_text(txt: Any) -> str:
+        if str(txt["state"]) == "disabled":
+            return ""
+        val = txt.get("1.0", "end").strip()
+        # Normalizar contenido: si empieza con 'Examen' quitar ese encabezado al guardar
+        if val.lower().startswith("examen"):
+            lines = val.splitlines()
+            if lines and lines[0].lower().startswith("examen"):
+                rest = "\n".join(lines[1:]).strip()
+                return rest
+        return val
 
     def _collect_entries(self) -> Dict[int, Tuple[str, str, str, str]]:
         """Extrae los textos escritos por el usuario, omitiendo celdas bloqueadas por festivo."""
-        out: Dict[int, Tuple[str, str, str, str]] = {}
-        for semana, (m, t, w1, w2) in self.inputs.items():
-            def get_text(txt: Any) -> str:
-                if str(txt["state"]) == "disabled":
-                    return ""
-                val = txt.get("1.0", "end").strip()
-                # Normalizar contenido: si empieza con 'Examen' quitar ese encabezado al guardar
-                if val.lower().startswith("examen"):
-                    lines = val.splitlines()
-                    if lines and lines[0].lower().startswith("examen"):
-                        rest = "\n".join(lines[1:]).strip()
-                        return rest
-                return val
-
-            out[semana] = (get_text(m), get_text(t), get_text(w1), get_text(w2))
-        return out
+        with TRACER.span("gui.collect_entries", weeks=len(self.model)):
+            for row in self._pool:
+                self._flush_row(row)
+            out: Dict[int, Tuple[str, str, str, str]] = {}
+            for week in self.model:
+                texts = self.entry_texts.get(week.semana, ("", "", "", ""))
+                m, t, w1, w2 = ("" if c.kind == CELL_HOLIDAY else txt for c, txt in zip(week.cells, texts))
+                out[week.semana] = (m, t, w1, w2)
+            return out
+
+    def _export_model(self, exams: Set[date]) -> Optional[Tuple[CalendarWeek, ...]]:
+        """Modelo de la grilla si sigue vigente para ``exams``; None para que el exportador lo calcule."""
+        return self.model if exams == self.exams else None
 
     def export_excel(self) -> None:
-        """Dialoga una ruta y genera el Excel usando build_excel()."""
-        title = self.var_title.get().strip() or "Calendario de sesiones"
-        subtitle = self.var_sub.get().strip()
+        """Dialoga una ruta y genera el Excel usando build_excel() en segundo plano."""
         path = filedialog.asksaveasfilename(
             title="Guardar como",
             defaultextension=".xlsx",
             filetypes=[("Excel", "*.xlsx")],
         )
+        if not path:
+            return
+        self._start_export(build_excel, path, "Excel")
+
+    def import_excel(self) -> None:
+        """Carga en la grilla los textos de un Excel exportado y editado fuera de la aplicación.
+
+        Usa read_excel() (primera hoja de calendario); sólo reemplaza los textos de las semanas
+        del archivo que existen en el calendario actual, sin tocar fechas ni exámenes.
+        """
+        path = filedialog.askopenfilename(title="Importar Excel", filetypes=[("Excel", "*.xlsx")])
         if not path:
             return
         try:
-            exams = self._get_exam_dates()
-            build_excel(path, title, subtitle, self.week_dates, self._collect_entries(), self.holidays, exams)
-            self._save_backup()
-            messagebox.showinfo("Listo", f"Archivo Excel generado:\n{path}")
+            rec = next(read_excel(path), None)
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo generar el Excel.\n{e}")
+            messagebox.showerror("Error", f"No se pudo leer el Excel.\n{e}")
+            return
+        if rec is None:
+            messagebox.showerror("Error", "El archivo no tiene semanas con el formato del calendario.")
+            return
+        self._collect_entries()  # volcar lo que haya en las filas visibles antes de reemplazar
+        for semana in rec["entries"]:
+            sem = int(semana)
+            if 1 <= sem <= len(self.model):
+                self.entry_texts[sem] = ["", "", "", ""]
+                self._dirty_weeks.add(sem)
+        self._apply_saved_entries(rec["entries"])
+        self._mark_dirty()
+        messagebox.showinfo("Importado", f"Se cargaron {len(rec['entries'])} semanas desde:\n{path}")
 
     def export_pdf(self) -> None:
-        """Dialoga una ruta y genera el PDF si reportlab está instalado."""
-        title = self.var_title.get().strip() or "Calendario de sesiones"
-        subtitle = self.var_sub.get().strip()
+        """Dialoga una ruta y genera el PDF (si reportlab está instalado) en segundo plano."""
         path = filedialog.asksaveasfilename(
             title="Guardar como",
             defaultextension=".pdf",
@@ -625,101 +3537,247 @@ class CalendarGUI:
         )
         if not path:
             return
+        self._start_export(build_pdf, path, "PDF")
+
+    def export_ics(self) -> None:
+        """Dialoga una ruta y genera el .ics (una cita por sesión) en segundo plano."""
+        path = filedialog.asksaveasfilename(
+            title="Guardar como",
+            defaultextension=".ics",
+            filetypes=[("iCalendar", "*.ics")],
+        )
+        if not path:
+            return
+        # Misma clave que usa el modo por lotes (nombre del curso): los UID coinciden entre ambos
+        course_key = self._course_name or _safe_filename(self.var_title.get().strip() or "Calendario de sesiones")
+        self._start_export(build_ics, path, "calendario", course_key=course_key)
+
+    def _start_export(self, builder: Callable[..., None], path: str, label: str, **options: Any) -> None:
+        """Lanza ``builder`` en un hilo; el avance y el resultado vuelven por una cola.
+
+        Los datos se toman del UI antes de empezar, así el hilo nunca toca widgets de Tk.
+        ``options`` se pasan tal cual a ``builder``.
+        """
+        if self._export_thread is not None:
+            return
+        title = self.var_title.get().strip() or "Calendario de sesiones"
+        subtitle = self.var_sub.get().strip()
         try:
             exams = self._get_exam_dates()
-            build_pdf(path, title, subtitle, self.week_dates, self._collect_entries(), self.holidays, exams)
-            self._save_backup()
-            messagebox.showinfo("Listo", f"Archivo PDF generado:\n{path}")
+            args = (path, title, subtitle, self.week_dates, self._collect_entries(), self.holidays, exams)
+            model = self._export_model(exams)
         except Exception as e:
-            messagebox.showerror("Error", f"No se pudo generar el PDF.\n{e}")
+            messagebox.showerror("Error", f"No se pudo generar el {label}.\n{e}")
+            return
+
+        cancel = self._export_cancel
+        cancel.clear()
+        out = self._export_queue
+
+        def progress(done: int, total: int) -> None:
+            if cancel.is_set():
+                raise ExportCancelled()
+            out.put(("progress", done, total))
+
+        def work() -> None:
+            # Los builders sólo escriben el archivo al final: cancelar no deja archivos a medias.
+            try:
+                builder(*args, model=model, progress=progress, **options)
+                out.put(("done", path, label))
+            except ExportCancelled:
+                out.put(("cancelled", path, label))
+            except Exception as e:
+                out.put(("error", e, label))
+
+        self.btn_excel.config(state=tk.DISABLED)
+        self.btn_pdf.config(state=tk.DISABLED)
+        self.btn_ics.config(state=tk.DISABLED)
+        self.btn_cancel.config(state=tk.NORMAL)
+        self.progress.config(value=0, maximum=1)
+        self._export_thread = threading.Thread(target=work, name="calendario-export", daemon=True)
+        self._export_thread.start()
+        self.root.after(EXPORT_POLL_MS, self._poll_export)
+
+    def _cancel_export(self) -> None:
+        self._export_cancel.set()
+        self.btn_cancel.config(state=tk.DISABLED)
+
+    def _poll_export(self) -> None:
+        """Procesa en el hilo de Tk los mensajes del hilo de exportación."""
+        finished: Optional[Tuple[Any, ...]] = None
+        while True:
+            try:
+                msg = self._export_queue.get_nowait()
+            except queue.Empty:
+                break
+            if msg[0] == "progress":
+                self.progress.config(value=msg[1], maximum=max(1, msg[2]))
+            else:
+                finished = msg
+        if finished is None:
+            self.root.after(EXPORT_POLL_MS, self._poll_export)
+            return
+
+        self._export_thread = None
+        self.btn_excel.config(state=tk.NORMAL)
+        self.btn_pdf.config(state=tk.NORMAL)
+        self.btn_ics.config(state=tk.NORMAL)
+        self.btn_cancel.config(state=tk.DISABLED)
+        self.progress.config(value=0)
+        kind, payload, label = finished
+        if kind == "done":
+            self._save_backup()
+            messagebox.showinfo("Listo", f"Archivo {label} generado:\n{payload}")
+        elif kind == "cancelled":
+            messagebox.showinfo("Cancelado", f"Se canceló la exportación a {label}.")
+        else:
+            messagebox.showerror("Error", f"No se pudo generar el {label}.\n{payload}")
 
     # ---------- Backup persistence ----------
     def _backup_path(self) -> str:
-        return os.path.join(os.path.dirname(__file__), "calendario_backup.json")
+        return default_store_path()
+
+    def _legacy_backup_path(self) -> str:
+        return os.path.join(_app_dir(), "calendario_backup.json")
 
     def _read_backup_file(self) -> Optional[Dict[str, Any]]:
+        """Abre el almacén y lee el curso a editar (migra el respaldo JSON la primera vez)."""
         try:
-            path = self._backup_path()
-            if os.path.exists(path):
-                with open(path, "r", encoding="utf-8") as f:
-                    return json.load(f)
+            self.store = CalendarStore(self._store_path)
+            legacy = self._legacy_backup_path()
+            if self.store.latest() is None and os.path.exists(legacy):
+                self.store.import_json(legacy)
+            if self._course_name:
+                self._course_id = self.store.find(self._course_name, self._semester)
+            else:
+                self._course_id = self.store.latest()
+            if self._course_id is None:
+                return None
+            record = self.store.load(self._course_id)
+            if record is not None and not self._course_name:
+                self._course_name = record["name"]
+            return record
         except Exception:
             return None
-        return None
 
-    def _save_backup(self) -> None:
+    def _backup_data(self) -> Dict[str, Any]:
+        """Instantánea del estado a respaldar (se arma en el hilo de Tk).
+
+        ``course`` es la cabecera en el formato del respaldo JSON y ``weeks`` sólo las semanas
+        editadas desde el último guardado (o todas, con ``replace=True``).
+        """
+        course: Dict[str, Any] = {}
+        course["title"] = self.var_title.get().strip()
+        course["subtitle"] = self.var_sub.get().strip()
+        # Calendario aplicado (no los controles): fecha y semanas sólo cambian con "Actualizar"
+        course["start_date"] = self.start.isoformat()
+        course["weeks"] = self.weeks
+        exams = sorted(self._get_exam_dates())
+        course["exam_dates"] = [d.isoformat() for d in exams]
+        entries = self._collect_entries()
+        replace = self._rewrite_all
+        weeks = entries if replace else {k: entries[k] for k in self._dirty_weeks if k in entries}
+        self._dirty_weeks.clear()
+        self._rewrite_all = False
+        return {"course": course, "weeks": {str(k): list(v) for k, v in weeks.items()}, "replace": replace}
+
+    def _write_backup(self, data: Dict[str, Any]) -> None:
+        """Guarda una instantánea en el almacén (se ejecuta en el hilo del respaldo)."""
+        if self.store is None:
+            raise RuntimeError(f"No se pudo abrir el almacén {self._store_path}")
         try:
-            data: Dict[str, Any] = {}
-            data["title"] = self.var_title.get().strip()
-            data["subtitle"] = self.var_sub.get().strip()
-            s = self._get_selected_start_date()
-            data["start_date"] = s.isoformat()
-            data["weeks"] = int(self.var_weeks.get()) if str(self.var_weeks.get()).isdigit() else self.weeks
-            exams = sorted(self._get_exam_dates())
-            data["exam_dates"] = [d.isoformat() for d in exams]
-            entries = self._collect_entries()
-            data["entries"] = {str(k): list(v) for k, v in entries.items()}
-            with open(self._backup_path(), "w", encoding="utf-8") as f:
-                json.dump(data, f, ensure_ascii=False, indent=2)
+            if self._course_id is None:
+                record = dict(data["course"], entries=data["weeks"])
+                self._course_id = self.store.put_course(record, self._course_name, self._semester)
+            else:
+                self.store.update_course(self._course_id, data["course"], data["weeks"], data["replace"])
+        except Exception:
+            self._rewrite_all = True  # las semanas de esta instantánea no quedaron: reescribir todo
+            raise
+
+    def _save_backup(self, wait: bool = False) -> None:
+        """Envía el respaldo al hilo escritor; con ``wait=True`` espera a que quede en disco."""
+        try:
+            self._dirty = False
+            with TRACER.span("backup.snapshot"):
+                data = self._backup_data()
+            self._backup_writer.submit(data)
+            if wait:
+                self._backup_writer.wait()
         except Exception:
             pass
 
+    def _mark_dirty(self, *_: Any) -> None:
+        """Marca cambios pendientes y reprograma el autoguardado (debounce)."""
+        self._dirty = True
+        if self._autosave_job is not None:
+            try:
+                self.root.after_cancel(self._autosave_job)
+            except Exception:
+                pass
+        self._autosave_job = self.root.after(AUTOSAVE_DELAY_MS, self._autosave)
+
+    def _autosave(self) -> None:
+        self._autosave_job = None
+        if self._dirty:
+            self._save_backup()
+
+    def _on_text_modified(self, event: Any) -> None:
+        # El flag "modified" del Text es el marcador de celda sucia: se limpia al volcar la
+        # fila al modelo (_flush_row), así que este evento llega una vez por edición nueva.
+        if event.widget.edit_modified():
+            self._mark_dirty()
+
     def _apply_saved_entries(self, saved: Dict[str, List[str]]) -> None:
         for semana, texts in saved.items():
             try:
                 sem = int(semana)
             except Exception:
                 continue
-            if sem not in self.inputs:
+            if not 1 <= sem <= len(self.model):
                 continue
-            widgets = self.inputs[sem]
-            for idx, txt in enumerate(texts[:4]):
-                if not txt:
+            week = self.model[sem - 1]
+            vals = self.entry_texts.setdefault(sem, ["", "", "", ""])
+            for idx, (cell, txt) in enumerate(zip(week.cells, texts[:4])):
+                if not txt or cell.kind == CELL_HOLIDAY:
                     continue
-                t = widgets[idx]
-                if str(t["state"]) == "disabled":
-                    continue
-                cur = t.get("1.0", "end").strip()
-                # Reemplazar siempre el contenido para evitar acumulación.
-                if cur.startswith("Examen"):
+                safe_txt = (txt or "").strip()
+                if cell.kind == CELL_EXAM and safe_txt.lower().startswith("examen"):
                     # Sanitizar el texto guardado: quitar encabezado 'Examen' si viene incluido
-                    safe_txt = (txt or "").strip()
-                    low = safe_txt.lower()
-                    if low.startswith("examen"):
-                        # Remover la primera línea si inicia con 'Examen'
-                        lines = safe_txt.splitlines()
-                        if lines and lines[0].lower().startswith("examen"):
-                            safe_txt = "\n".join(lines[1:]).strip()
-                    t.delete("1.0", "end")
-                    t.insert("1.0", "Examen" + ("\n" + safe_txt if safe_txt else ""))
+                    lines = safe_txt.splitlines()
+                    if lines and lines[0].lower().startswith("examen"):
+                        safe_txt = "\n".join(lines[1:]).strip()
+                    vals[idx] = safe_txt
                 else:
-                    t.delete("1.0", "end")
-                    t.insert("1.0", txt)
+                    vals[idx] = txt
+        # Volver a pintar las filas visibles con los textos aplicados
+        for row in self._pool:
+            row.week = None
+        self._refresh_visible()
 
-    def _load_backup(self) -> None:
+    def _load_backup(self) -> Dict[str, Any]:
+        """Lee el curso del almacén y retorna sólo los valores válidos para el arranque.
+
+        Claves posibles: title, subtitle, start (lunes), weeks, exam_dates (lista de date)
+        y entries (semana -> textos, tal como están en el JSON).
+        """
         data = self._read_backup_file()
-        if not data:
-            return
-        # Evitar aplicar múltiples veces en una sesión
-        if getattr(self, "_backup_loaded", False):
-            return
+        out: Dict[str, Any] = {}
+        if not isinstance(data, dict):
+            return out
         if isinstance(data.get("title"), str):
-            self.var_title.set(data["title"])
+            out["title"] = data["title"]
         if isinstance(data.get("subtitle"), str):
-            self.var_sub.set(data["subtitle"])
+            out["subtitle"] = data["subtitle"]
         try:
             if isinstance(data.get("start_date"), str):
                 d = date.fromisoformat(data["start_date"])
-                if TKCAL_OK:
-                    self.date_widget.set_date(d)
-                else:
-                    self._var_day.set(f"{d.day:02d}")
-                    self._var_month.set(f"{d.month:02d}")
-                    self._var_year.set(str(d.year))
+                if d.weekday() == 0:
+                    out["start"] = d
         except Exception:
             pass
-        if isinstance(data.get("weeks"), int):
-            self.var_weeks.set(str(data["weeks"]))
+        if isinstance(data.get("weeks"), int) and 0 < data["weeks"] <= MAX_WEEKS:
+            out["weeks"] = data["weeks"]
         ex: List[date] = []
         if isinstance(data.get("exam_dates"), list):
             for s in data["exam_dates"]:
@@ -727,25 +3785,21 @@ class CalendarGUI:
                     ex.append(date.fromisoformat(s))
                 except Exception:
                     pass
-        for i, d in enumerate(ex[:len(self.exam_inputs)]):
-            w = self.exam_inputs[i]
-            try:
-                if TKCAL_OK and hasattr(w, 'set_date'):
-                    w.set_date(d)
-                else:
-                    w.delete(0, "end")
-                    w.insert(0, d.strftime("%d/%m/%Y"))
-            except Exception:
-                continue
-        # Rebuild now that inputs may have changed
-        self.rebuild_calendar()
-        entries = data.get("entries")
-        if isinstance(entries, dict):
-            self._apply_saved_entries(entries)
-        self._backup_loaded = True
+        out["exam_dates"] = ex
+        if isinstance(data.get("entries"), dict):
+            out["entries"] = data["entries"]
+        return out
 
     def _on_close(self) -> None:
-        self._save_backup()
+        self._export_cancel.set()
+        if self._autosave_job is not None:
+            try:
+                self.root.after_cancel(self._autosave_job)
+            except Exception:
+                pass
+        self._save_backup(wait=True)
+        if self.store is not None:
+            self.store.close()
         try:
             self.root.destroy()
         except Exception:
@@ -754,8 +3808,10 @@ class CalendarGUI:
     def manual_save_backup(self) -> None:
         """Guarda el respaldo manualmente y notifica la ruta de guardado."""
         try:
-            self._save_backup()
-            messagebox.showinfo("Respaldo", f"Respaldo guardado en:\n{self._backup_path()}")
+            self._save_backup(wait=True)
+            if self._backup_writer.error is not None:
+                raise self._backup_writer.error
+            messagebox.showinfo("Respaldo", f"Respaldo guardado en:\n{self._store_path}")
         except Exception as e:
             messagebox.showerror("Error", f"No se pudo guardar el respaldo.\n{e}")
 
@@ -764,24 +3820,143 @@ class CalendarGUI:
         return "break"
 
 
-def run_gui() -> int:
-    """Punto de entrada de la GUI; devuelve código de salida (0=OK)."""
+def run_gui(
+    startup_report: Optional[str] = None,
+    store_path: Optional[str] = None,
+    course: Optional[str] = None,
+    semester: Optional[str] = None,
+) -> int:
+    """Punto de entrada de la GUI; devuelve código de salida (0=OK).
+
+    Con ``startup_report`` mide el arranque en frío, escribe el informe en esa ruta y
+    cierra la ventana en cuanto queda lista (útil para el .exe, que no tiene consola).
+    ``store_path``, ``course`` y ``semester`` eligen el almacén y el curso a editar.
+    """
     if tk is None:
         print("tkinter no está disponible en este entorno.")
         return 2
+    phases = [("módulo importado", time.perf_counter() - _T0)]
     root = tk.Tk()
-    CalendarGUI(root)
+    CalendarGUI(root, store_path=store_path, course=course, semester=semester)
+    phases.append(("GUI construida", time.perf_counter() - _T0))
+    if startup_report:
+        def report() -> None:
+            phases.append(("ventana lista (primer idle)", time.perf_counter() - _T0))
+            _write_startup_report(startup_report, phases)
+            root.destroy()
+
+        root.after_idle(report)
     root.mainloop()
     return 0
 
 
+def _write_startup_report(path: str, phases: List[Tuple[str, float]]) -> None:
+    """Escribe las fases del arranque y la tabla de importaciones (formato -X importtime)."""
+    lines = ["Arranque (segundos desde la carga del módulo)"]
+    lines += [f"  {name:<30} {secs:8.3f}" for name, secs in phases]
+    if _IMPORT_TIMER is not None:
+        _IMPORT_TIMER.uninstall()
+        lines.append("")
+        lines.append("import time: self [us] | cumulative | imported package")
+        for depth, name, own, cumulative in _IMPORT_TIMER.rows:
+            lines.append(f"import time: {own * 1e6:9.0f} | {cumulative * 1e6:10.0f} | {'  ' * depth}{name}")
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines) + "\n")
+
+
 def main(argv: Optional[List[str]] = None) -> int:
     """Entrada principal del módulo.
 
-    Por ahora siempre abre la GUI. En el futuro se podría añadir CLI para
-    exportar directamente sin abrir ventana (p. ej. leyendo un JSON/CSV).
+    Sin argumentos abre la GUI. Con ``--batch MANIFIESTO`` exporta todos los cursos
+    del manifiesto (JSON/CSV) sin abrir ventana, por ejemplo:
+
+        python generar_calendario_gui.py --batch cursos.json --out salida --workers 4
     """
-    return run_gui()
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generador de calendario de clases")
+    parser.add_argument("--batch", metavar="MANIFIESTO", help="JSON/CSV con un curso por fila; exporta sin GUI")
+    parser.add_argument("--out", default="salida", help="carpeta de salida del modo por lotes (por defecto: salida)")
+    parser.add_argument("--workers", type=int, default=None, help="procesos en paralelo (por defecto: núcleos de CPU)")
+    parser.add_argument("--formats", default="xlsx,pdf", help="formatos separados por coma: xlsx,pdf,ics")
+    parser.add_argument("--merge-pdf", metavar="RUTA",
+                        help="une además los PDF de todos los cursos en RUTA, con un marcador por curso")
+    parser.add_argument("--workbook", metavar="RUTA",
+                        help="escribe además todos los cursos en un solo .xlsx (una hoja por curso + índice)")
+    parser.add_argument("--ics-feed", metavar="RUTA",
+                        help="escribe además un solo .ics con las sesiones de todos los cursos")
+    parser.add_argument("--sessions", metavar="RUTA",
+                        help="escribe además una fila por sesión de todos los cursos (.csv o .parquet)")
+    parser.add_argument("--pdf-mode", choices=PDF_MODES, default="platypus",
+                        help="platypus (por defecto), fast (texto plano donde cabe) o canvas (dibujo directo)")
+    parser.add_argument("--excel-engine", choices=EXCEL_ENGINES, default="openpyxl",
+                        help="openpyxl (por defecto) o xlsxwriter (constant_memory, más rápido en lotes grandes)")
+    parser.add_argument("--deterministic", action="store_true",
+                        help="metadatos fijos (SOURCE_DATE_EPOCH o 2000-01-01): mismos datos, mismos bytes")
+    parser.add_argument("--cache", metavar="CARPETA",
+                        help="reutiliza los archivos de cursos sin cambios guardados en CARPETA (caché LRU)")
+    parser.add_argument("--cache-mb", type=int, default=None,
+                        help="tamaño máximo de la caché en MB (por defecto 256)")
+    parser.add_argument("--store", metavar="RUTA",
+                        help="almacén SQLite de cursos (por defecto: calendario.db junto al programa o al .exe)")
+    parser.add_argument("--course", metavar="NOMBRE", help="curso a abrir o exportar del almacén")
+    parser.add_argument("--semester", metavar="SEMESTRE",
+                        help="semestre del curso (p. ej. 2025-2); también filtra --batch y --export-json")
+    parser.add_argument("--import-json", metavar="ARCHIVO",
+                        help="importa al almacén un respaldo JSON o un manifiesto JSON/CSV y termina")
+    parser.add_argument("--import-xlsx", metavar="RUTA", nargs="+",
+                        help="importa al almacén los textos de Excel editados (archivos o carpetas con .xlsx) y termina")
+    parser.add_argument("--export-json", metavar="ARCHIVO",
+                        help="exporta del almacén un curso (--course) o una lista de cursos y termina")
+    parser.add_argument("--startup-report", nargs="?", const="calendario_arranque.txt", metavar="RUTA",
+                        help="mide el arranque de la GUI, escribe el informe y cierra la ventana")
+    parser.add_argument("--trace", nargs="?", const="calendario_traza.json", metavar="RUTA",
+                        help="registra spans por fase; .json = Chrome Trace, otra extensión = JSON Lines")
+    args = parser.parse_args(argv)
+
+    if args.trace:
+        TRACER.enable(args.trace)
+        # Los procesos del lote (spawn en Windows) heredan la activación por el entorno
+        os.environ["CALENDARIO_TRACE"] = args.trace
+
+    if args.cache:
+        EXPORT_CACHE.root = args.cache
+        # Igual que --trace: los procesos del lote leen la configuración del entorno
+        os.environ["CALENDARIO_EXPORT_CACHE"] = args.cache
+    if args.cache_mb is not None:
+        EXPORT_CACHE.max_bytes = args.cache_mb << 20
+        os.environ["CALENDARIO_EXPORT_CACHE_MB"] = str(args.cache_mb)
+
+    if args.import_json or args.import_xlsx or args.export_json:
+        store = CalendarStore(args.store or default_store_path())
+        try:
+            if args.import_json:
+                n = store.import_json(args.import_json, args.semester)
+                print(f"Importados: {n} cursos en {store.path}")
+            if args.import_xlsx:
+                paths: List[str] = []
+                for p in args.import_xlsx:
+                    if os.path.isdir(p):
+                        paths += sorted(os.path.join(p, f) for f in os.listdir(p) if f.lower().endswith(".xlsx"))
+                    else:
+                        paths.append(p)
+                t0 = time.perf_counter()
+                updated, created = store.import_excel(paths, args.semester)
+                print(f"Excel leídos: {len(paths)}  Cursos actualizados: {updated}  Nuevos: {created}  "
+                      f"({time.perf_counter() - t0:.2f} s)")
+            if args.export_json:
+                n = store.export_json(args.export_json, args.course, args.semester)
+                print(f"Exportados: {n} cursos a {args.export_json}")
+        finally:
+            store.close()
+        return 0
+
+    if args.batch:
+        formats = tuple(f.strip().lower() for f in args.formats.split(",") if f.strip())
+        return run_batch(args.batch, args.out, args.workers, formats, args.pdf_mode, args.merge_pdf,
+                         args.excel_engine, args.workbook, args.deterministic, args.semester, args.ics_feed,
+                         args.sessions)
+    return run_gui(args.startup_report, args.store, args.course, args.semester)
 
 
 if __name__ == "__main__":
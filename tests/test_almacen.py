@@ -0,0 +1,54 @@
+"""CalendarStore: fecha de modificación de los cursos."""
+
+import itertools
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generar_calendario_gui as cal  # noqa: E402
+
+
+def _registro(titulo):
+    return {
+        "title": titulo,
+        "subtitle": "Desde 18/08/2025",
+        "start_date": "2025-08-18",
+        "weeks": 4,
+        "entries": {"2": ["Tema", "", "", ""]},
+    }
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    # Reloj que siempre avanza: el orden por ``updated`` no depende de la resolución del sistema
+    reloj = itertools.count(1_750_000_000)
+    monkeypatch.setattr(cal.time, "time", lambda: float(next(reloj)))
+    store = cal.CalendarStore(str(tmp_path / "calendario.db"))
+    yield store
+    store.close()
+
+
+def test_actualizar_solo_semanas_cambia_fecha_de_modificacion(store):
+    a = store.put_course(_registro("Curso A"), semester="2025-2")
+    b = store.put_course(_registro("Curso B"), semester="2025-2")
+    assert store.latest() == b
+    store.update_course(a, weeks={"3": ["Nuevo", "", "", ""]})
+    assert store.latest() == a
+    store.update_course(b, weeks={})  # sin cambios: la fecha se conserva
+    assert store.latest() == a
+
+
+def test_importar_excel_cambia_fecha_de_modificacion(store, tmp_path):
+    pytest.importorskip("openpyxl")
+    a = store.put_course(_registro("Curso A"), semester="2025-2")
+    b = store.put_course(_registro("Curso B"), semester="2025-2")
+    editado = _registro("Curso A")
+    editado["entries"] = {"2": ["Editado", "", "", ""]}
+    libro = str(tmp_path / "todos.xlsx")
+    cal.build_workbook(libro, [cal._parse_course(editado)])
+    assert store.import_excel([libro], "2025-2") == (1, 0)
+    assert store.latest() == a != b
+    assert store.load(a)["entries"]["2"][0] == "Editado"
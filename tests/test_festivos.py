@@ -0,0 +1,50 @@
+"""El motor propio de festivos (colombia_holidays) frente a la librería ``holidays``."""
+
+import os
+import sys
+from datetime import date
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generar_calendario_gui as cal  # noqa: E402
+
+holidays = pytest.importorskip("holidays")
+
+
+@pytest.mark.parametrize("year", range(1901, 2101))
+def test_colombia_holidays_coincide_con_libreria(year):
+    esperado = dict(holidays.country_holidays("CO", years=year))
+    obtenido = cal.colombia_holidays(year)
+    assert set(obtenido) == set(esperado)
+    assert obtenido == esperado  # mismos nombres (p. ej. "San Pedro y San Pablo (observado)")
+
+
+@pytest.mark.parametrize("year", [1961, 2000, 2024, 2025, 2038, 2100])
+def test_easter_sunday_coincide_con_dateutil(year):
+    easter = pytest.importorskip("dateutil.easter")
+    assert cal.easter_sunday(year) == easter.easter(year)
+
+
+def test_get_colombia_holidays_rango_entre_anios():
+    esperado = {
+        d: n for d, n in holidays.country_holidays("CO", years=[2025, 2026]).items()
+        if date(2025, 12, 1) <= d <= date(2026, 1, 31)
+    }
+    assert cal.get_colombia_holidays(date(2025, 12, 1), date(2026, 1, 31)) == esperado
+
+
+def test_indice_no_expulsa_los_anios_del_rango_consultado(monkeypatch):
+    indice = cal._HolidayIndex(max_years=4)
+    construidos = []
+    original = indice._build_year
+    monkeypatch.setattr(indice, "_build_year", lambda y: construidos.append(y) or original(y))
+
+    rango = indice.range(date(2000, 1, 1), date(2009, 12, 31))
+    assert rango == cal._HolidayIndex().range(date(2000, 1, 1), date(2009, 12, 31))
+    assert indice.range(date(2000, 1, 1), date(2009, 12, 31)) == rango
+    assert construidos == list(range(2000, 2010))  # la segunda consulta no recalcula nada
+
+    indice.year(2050)  # fuera del rango: el índice vuelve a max_years
+    assert list(indice._years) == [2007, 2008, 2009, 2050]
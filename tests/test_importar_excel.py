@@ -0,0 +1,77 @@
+"""Ida y vuelta de los Excel exportados: build_workbook() -> read_excel() -> CalendarStore."""
+
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import generar_calendario_gui as cal  # noqa: E402
+
+TITULOS = [
+    "Fundamentos de Ciencias Básicas - 2025 - B",
+    "Fundamentos de Ciencias Básicas - 2025 - C",  # mismos 31 primeros caracteres: hoja "~2"
+]
+NOMBRES = [cal._safe_filename(t) for t in TITULOS]
+
+
+def _curso(titulo, tema):
+    rec = {
+        "title": titulo,
+        "subtitle": "Desde 18/08/2025",
+        "start_date": "2025-08-18",
+        "weeks": 4,
+        "entries": {"1": ["", tema, "", ""], "3": [tema, "", "", ""]},  # 18/08/2025 es festivo
+    }
+    return rec, cal._parse_course(rec)
+
+
+@pytest.mark.parametrize("engine", cal.EXCEL_ENGINES)
+def test_libro_vuelve_a_sus_cursos(tmp_path, engine):
+    pytest.importorskip("openpyxl")
+    if engine == "xlsxwriter":
+        pytest.importorskip("xlsxwriter")
+    store = cal.CalendarStore(str(tmp_path / "calendario.db"))
+    try:
+        cursos = []
+        for titulo in TITULOS:
+            store.put_course(_curso(titulo, "Original")[0], semester="2025-2")
+            cursos.append(_curso(titulo, f"Editado {titulo[-1]}")[1])
+        libro = str(tmp_path / "todos.xlsx")
+        hojas = cal.build_workbook(libro, cursos, engine=engine)
+        assert all(len(h) <= 31 for h in hojas) and hojas[0] != NOMBRES[0]
+
+        assert [r["name"] for r in cal.read_excel(libro)] == NOMBRES
+        assert store.import_excel([libro], "2025-2") == (2, 0)
+        assert len(store.courses("2025-2")) == 2
+        for nombre in NOMBRES:
+            entries = store.load(store.find(nombre, "2025-2"))["entries"]
+            assert entries["1"][1] == entries["3"][0] == f"Editado {nombre[-1]}"
+    finally:
+        store.close()
+
+
+def test_tema_que_empieza_con_semana_no_es_encabezado():
+    filas = [
+        ("Curso", None, None, None),
+        ("Desde 18/08/2025", None, None, None),
+        ("SEMANA 1 Agosto", None, None, None),
+        ("Lunes 18/08", "Martes 19/08", "Miércoles 20/08", "Miércoles 20/08"),
+        ("Semana 5 de repaso", "SEMANA 2 del libro", "", ""),
+        (None, None, None, None),
+    ]
+    rec = cal._xlsx_sheet(filas, "curso")
+    assert rec["entries"] == {"1": ["Semana 5 de repaso", "SEMANA 2 del libro", "", ""]}
+    assert rec["weeks"] == 1
+
+
+def test_hoja_sin_fila_de_textos():
+    filas = [
+        ("Curso 2025", None, None, None),
+        ("SEMANA 3 Agosto", None, None, None),
+        ("Lunes 18/08", "Martes 19/08", "Miércoles 20/08", "Miércoles 20/08"),
+    ]
+    rec = cal._xlsx_sheet(filas, "curso")
+    assert rec["entries"] == {} and rec["weeks"] == 3
+    assert rec["start_date"] == "2025-08-04"